@@ -4,6 +4,7 @@ from enum import Enum
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy
 
 
@@ -50,6 +51,11 @@ class Agent(models.Model):
     is_healthy = models.BooleanField(default=True, null=True, blank=True)
     users_authorized = models.ManyToManyField(User, related_name='agents_authorized', null=True, blank=True)
 
+    @cached_property
+    def name_lower(self):
+        # the lowercased name appears in log file names composed on hot paths
+        return self.name.lower()
+
     def __str__(self):
         return self.name
 
@@ -26,7 +26,7 @@ from plantit import settings
 from plantit.users.models import Profile, Migration, ManagedFile
 from plantit.agents.models import Agent
 from plantit.celery import app
-from plantit.healthchecks import is_healthy
+from plantit.healthchecks import is_healthy, run_agent_healthchecks
 from plantit.queries import refresh_user_workflow_cache, refresh_online_users_workflow_cache, refresh_online_user_orgs_workflow_cache, \
     refresh_user_cyverse_tokens
 from plantit.redis import RedisClient
@@ -156,7 +156,7 @@ def prep_environment(self, guid: str):
         work_dir = join(task.agent.workdir, task.guid)
         ssh = get_agent_ssh_client(task.agent)
         with ssh:
-            for line in list(execute_command(ssh=ssh, setup_command=':', command=f"mkdir -v {work_dir}")): logger.info(line)
+            for line in execute_command(ssh=ssh, setup_command=':', command=f"mkdir -v {work_dir}"): logger.info(line)
             upload_deployment_artifacts(task, ssh, options)
 
         # set task to running
@@ -792,7 +792,7 @@ def tidy_up(guid: str):
         # remove_task_orchestration_logs(task)
 
         logger.info(f"Cleaning up task with GUID {guid} remote working directory {task.agent.workdir}")
-        command = f"rm -rf {join(task.agent.workdir, task.workdir)}"
+        command = f"rm -rf {task.full_workdir}"
         ssh = get_agent_ssh_client(task.agent)
         with ssh:
             for line in execute_command(ssh=ssh, setup_command=task.agent.pre_commands, command=command, directory=task.agent.workdir,
@@ -993,21 +993,26 @@ def agents_healthchecks():
         return
 
     try:
-        for agent in Agent.objects.all():
-            healthy, output = is_healthy(agent)
-            plantit.healthchecks.is_healthy = healthy
-            agent.save()
-
-            redis = RedisClient.get()
-            length = redis.llen(f"healthchecks/{agent.name}")
-            checks_saved = int(settings.AGENTS_HEALTHCHECKS_SAVED)
-            if length > checks_saved: redis.rpop(f"healthchecks/{agent.name}")
+        # check agents concurrently (each blocks on an SSH round trip to an
+        # independent host), then do DB/Redis bookkeeping from this thread
+        agents = list(Agent.objects.all())
+        redis = RedisClient.get()
+        checks_saved = int(settings.AGENTS_HEALTHCHECKS_SAVED)
+        pipe = redis.pipeline()
+        for agent, (healthy, output) in zip(agents, run_agent_healthchecks(agents)):
+            agent.is_healthy = healthy
+            agent.save(update_fields=['is_healthy'])
+
             check = {
                 'timestamp': timezone.now().isoformat(),
                 'healthy': healthy,
                 'output': output
             }
-            redis.lpush(f"healthchecks/{agent.name}", json.dumps(check))
+            # LPUSH + LTRIM bounds the list without the LLEN/RPOP round trips,
+            # so the bookkeeping for all agents batches into a single pipeline
+            pipe.lpush(f"healthchecks/{agent.name}", json.dumps(check))
+            pipe.ltrim(f"healthchecks/{agent.name}", 0, checks_saved)
+        pipe.execute()
     finally:
         __release_lock(task_name)
 
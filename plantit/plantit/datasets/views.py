@@ -19,10 +19,12 @@ import plantit.queries as q
 from plantit.datasets.models import DatasetAccessPolicy, DatasetRole
 from plantit.miappe.models import Investigation, Study
 from plantit.notifications.models import Notification
-from plantit.users.models import Profile
 
 logger = logging.getLogger(__name__)
 
+# wrapped once at import time: sync_to_async builds a new adapter closure on every call
+get_user_async = sync_to_async(User.objects.get)
+
 
 @login_required
 @swagger_auto_schema(method='get', auto_schema=None)
@@ -80,7 +82,7 @@ async def share(request):
 
     for guest in guests:
         try:
-            user = await sync_to_async(User.objects.get)(username=guest['user'])
+            user = await get_user_async(username=guest['user'])
         except:
             print(traceback.format_exc())
             return HttpResponseNotFound()
@@ -110,7 +112,7 @@ async def share(request):
             }
         })
 
-    profile = await sync_to_async(Profile.objects.get)(user=owner)
+    profile = await q.get_user_django_profile(owner)
     client = AsyncCyverseClient(profile.cyverse_access_token, int(settings.HTTP_TIMEOUT))
     await client.share_async(body)
 
@@ -149,7 +151,7 @@ async def unshare(request):
         role = DatasetRole.read if role_str.lower() == 'read' else DatasetRole.write
 
     try:
-        guest = await sync_to_async(User.objects.get)(username=guest_username)
+        guest = await get_user_async(username=guest_username)
     except:
         return HttpResponseNotFound()
 
@@ -175,7 +177,7 @@ async def unshare(request):
         }
     })
 
-    profile = await sync_to_async(Profile.objects.get)(user=owner)
+    profile = await q.get_user_django_profile(owner)
     client = AsyncCyverseClient(profile.cyverse_access_token, int(settings.HTTP_TIMEOUT))
     await client.unshare_async(body)
 
@@ -206,7 +208,7 @@ async def create(request):
     owner = request.user
     body = json.loads(request.body.decode('utf-8'))
     path = body['path']
-    profile = await sync_to_async(Profile.objects.get)(user=owner)
+    profile = await q.get_user_django_profile(owner)
     client = AsyncCyverseClient(profile.cyverse_access_token, int(settings.HTTP_TIMEOUT))
     await client.mkdir_async(path)
     return JsonResponse({'path': path})
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import requests
 
 from requests import RequestException, ReadTimeout, Timeout, HTTPError
@@ -26,6 +28,8 @@ def image_exists(name, owner=None, tag=None):
         return False
 
 
+# parsing is a pure function of the image string, so memoize it (workflow resubmissions reuse the same strings)
+@lru_cache(maxsize=1024)
 def parse_image_components(value):
     container_split = value.split('#', 1)[0].strip().split('/')  # get rid of comments first
     container_name = container_split[-1]
@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from typing import List
 
 import httpx
@@ -11,6 +13,13 @@ from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_excep
 
 from plantit.validation import validate_workflow_configuration
 
+# libyaml's C loader is an order of magnitude faster than the pure-Python one,
+# but it's an optional extra, so fall back if PyYAML was built without it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,6 +66,32 @@ async def get_repo(owner: str, name: str, token: str, timeout: int = 15) -> dict
         return repo
 
 
+# short-lived in-process memo for get_repo: overlapping rescans (celery beat
+# plus user-triggered refreshes) request the same repos within seconds of each
+# other, and each duplicate fetch is a full GitHub API round trip
+REPO_CACHE_SECONDS = 30
+_REPO_CACHE_MAX = 1024
+_repo_cache = OrderedDict()
+
+
+async def get_repo_cached(owner: str, name: str, token: str, timeout: int = 15) -> dict:
+    """
+    Like `get_repo`, but memoizes results in-process for a few seconds so burst
+    rescans hit memory instead of the GitHub API. Keyed by the token's hash as
+    well as the repo, so per-user authorization is respected.
+    """
+
+    key = (owner, name, hash(token))
+    now = time.monotonic()
+    cached = _repo_cache.get(key)
+    if cached is not None and now - cached[0] < REPO_CACHE_SECONDS: return cached[1]
+    repo = await get_repo(owner, name, token, timeout)
+    _repo_cache[key] = (now, repo)
+    _repo_cache.move_to_end(key)
+    while len(_repo_cache) > _REPO_CACHE_MAX: _repo_cache.popitem(last=False)
+    return repo
+
+
 @retry(
     reraise=True,
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -140,11 +175,11 @@ async def get_repo_config(owner: str, name: str, token: str, branch: str = 'mast
         response.raise_for_status()
         config = response.text
         logger.info(f"Retrieved config for {owner}/{name}:\n{config}")
-        return yaml.load(config)
+        return yaml.load(config, Loader=SafeLoader)
 
 
 async def get_repo_bundle(owner: str, name: str, branch: str, github_token: str, cyverse_token: str) -> dict:
-    tasks = [get_repo(owner, name, github_token), get_repo_config(owner, name, github_token, branch)]
+    tasks = [get_repo_cached(owner, name, github_token), get_repo_config(owner, name, github_token, branch)]
     responses = await asyncio.gather(*tasks, return_exceptions=True)
     repo = responses[0]
     config = responses[1]
@@ -175,51 +210,52 @@ async def list_connectable_repos_by_org(owner: str, token: str, timeout: int = 1
         workflows = []
         org_repos = await list_repositories(owner, token)
 
-        # TODO refactor to send reqs in parallel
-        for repository in org_repos:
-            branches = await list_repo_branches(owner, repository['name'], token)
-            for branch in branches:
-                response = await client.get(
-                    f"https://raw.githubusercontent.com/{owner}/{repository['name']}/{branch['name']}/plantit.yaml",
-                    headers={
-                        "Authorization": f"token {token}",
-                        "Accept": "application/vnd.github.mercy-preview+json"  # so repo topics will be returned
-                    })
-
-                if response.status_code == 404:
-                    continue
-                if response.status_code != 200:
-                    logger.warning(f"Failed to retrieve plantit.yaml from {owner}/{repository['name']}/{branch['name']}")
-                    continue
-                else:
-                    logger.info(f"Found plantit.yaml in {owner}/{repository['name']}/{branch['name']}")
-
-                repository['organization'] = owner
-
-                try:
-                    config = yaml.safe_load(response.text)
-                    valid, errors = validate_workflow_configuration(config)
-                    workflows.append({
-                        'repo': repository,
-                        'config': config,
-                        'branch': branch,
-                        'validation': {
-                            'is_valid': valid,
-                            'errors': errors
-                        },
-                        'example': owner == 'Computational-Plant-Science' and 'example' in repository['name'].lower()
-                    })
-                except Exception:
-                    workflows.append({
-                        'repo': repository,
-                        'config': {},
-                        'branch': branch,
-                        'validation': {
-                            'is_valid': False,
-                            'errors': [traceback.format_exc()]
-                        },
-                        'example': False
-                    })
+        # each repository's branch list and each branch's plantit.yaml are
+        # independent fetches, so overlap them instead of awaiting serially
+        branch_lists = await asyncio.gather(*[list_repo_branches(owner, repository['name'], token) for repository in org_repos])
+        pairs = [(repository, branch) for repository, branches in zip(org_repos, branch_lists) for branch in branches]
+        responses = await asyncio.gather(*[client.get(
+            f"https://raw.githubusercontent.com/{owner}/{repository['name']}/{branch['name']}/plantit.yaml",
+            headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github.mercy-preview+json"  # so repo topics will be returned
+            }) for repository, branch in pairs])
+
+        for (repository, branch), response in zip(pairs, responses):
+            if response.status_code == 404:
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Failed to retrieve plantit.yaml from {owner}/{repository['name']}/{branch['name']}")
+                continue
+            else:
+                logger.info(f"Found plantit.yaml in {owner}/{repository['name']}/{branch['name']}")
+
+            repository['organization'] = owner
+
+            try:
+                config = yaml.load(response.text, Loader=SafeLoader)
+                valid, errors = validate_workflow_configuration(config)
+                workflows.append({
+                    'repo': repository,
+                    'config': config,
+                    'branch': branch,
+                    'validation': {
+                        'is_valid': valid,
+                        'errors': errors
+                    },
+                    'example': owner == 'Computational-Plant-Science' and 'example' in repository['name'].lower()
+                })
+            except Exception:
+                workflows.append({
+                    'repo': repository,
+                    'config': {},
+                    'branch': branch,
+                    'validation': {
+                        'is_valid': False,
+                        'errors': [traceback.format_exc()]
+                    },
+                    'example': False
+                })
 
         return workflows
 
@@ -239,47 +275,49 @@ async def list_connectable_repos_by_owner(owner: str, token: str, timeout: int =
     async with httpx.AsyncClient(headers=headers, timeout=timeout) as client:
         workflows = []
         owned_repos = await list_repositories(owner, token)
-        for repository in owned_repos:
-            branches = await list_repo_branches(owner, repository['name'], token)
-            for branch in branches:
-                response = await client.get(
-                    f"https://raw.githubusercontent.com/{owner}/{repository['name']}/{branch['name']}/plantit.yaml",
-                    headers={
-                        "Authorization": f"token {token}",
-                        "Accept": "application/vnd.github.mercy-preview+json"  # so repo topics will be returned
-                    })
-
-                if response.status_code == 404:
-                    continue
-                if response.status_code != 200:
-                    logger.warning(f"Failed to retrieve plantit.yaml from {owner}/{repository['name']}/{branch['name']}")
-                    continue
-                else:
-                    logger.info(f"Found plantit.yaml in {owner}/{repository['name']}/{branch['name']}")
-
-                try:
-                    config = yaml.safe_load(response.text)
-                    valid, errors = validate_workflow_configuration(config)
-                    workflows.append({
-                        'repo': repository,
-                        'config': config,
-                        'branch': branch,
-                        'validation': {
-                            'is_valid': valid,
-                            'errors': errors
-                        }
-                    })
-                    
-                except Exception:
-                    workflows.append({
-                        'repo': repository,
-                        'config': {},
-                        'branch': branch,
-                        'validation': {
-                            'is_valid': False,
-                            'errors': [traceback.format_exc()]
-                        }
-                    })
+
+        # as above, overlap the per-repository and per-branch fetches
+        branch_lists = await asyncio.gather(*[list_repo_branches(owner, repository['name'], token) for repository in owned_repos])
+        pairs = [(repository, branch) for repository, branches in zip(owned_repos, branch_lists) for branch in branches]
+        responses = await asyncio.gather(*[client.get(
+            f"https://raw.githubusercontent.com/{owner}/{repository['name']}/{branch['name']}/plantit.yaml",
+            headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github.mercy-preview+json"  # so repo topics will be returned
+            }) for repository, branch in pairs])
+
+        for (repository, branch), response in zip(pairs, responses):
+            if response.status_code == 404:
+                continue
+            if response.status_code != 200:
+                logger.warning(f"Failed to retrieve plantit.yaml from {owner}/{repository['name']}/{branch['name']}")
+                continue
+            else:
+                logger.info(f"Found plantit.yaml in {owner}/{repository['name']}/{branch['name']}")
+
+            try:
+                config = yaml.load(response.text, Loader=SafeLoader)
+                valid, errors = validate_workflow_configuration(config)
+                workflows.append({
+                    'repo': repository,
+                    'config': config,
+                    'branch': branch,
+                    'validation': {
+                        'is_valid': valid,
+                        'errors': errors
+                    }
+                })
+
+            except Exception:
+                workflows.append({
+                    'repo': repository,
+                    'config': {},
+                    'branch': branch,
+                    'validation': {
+                        'is_valid': False,
+                        'errors': [traceback.format_exc()]
+                    }
+                })
 
         return workflows
 
@@ -1,15 +1,13 @@
-import subprocess
 import traceback
 import logging
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 
-from paramiko import SSHException
 from requests import RequestException, ReadTimeout, Timeout, HTTPError
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 
 from plantit.agents.models import Agent
-from plantit.ssh import SSH, execute_command, get_agent_ssh_client
-from plantit.keypairs import get_user_private_key_path
+from plantit.ssh import execute_command, get_agent_ssh_client
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +18,7 @@ logger = logging.getLogger(__name__)
 @retry(
     wait=wait_exponential(multiplier=1, min=4, max=10),
     stop=stop_after_attempt(3),
-    retry=(retry_if_exception_type(ConnectionError) | retry_if_exception_type(
-        RequestException) | retry_if_exception_type(ReadTimeout) | retry_if_exception_type(
-        Timeout) | retry_if_exception_type(HTTPError)))
+    retry=retry_if_exception_type((ConnectionError, RequestException, ReadTimeout, Timeout, HTTPError)))
 def is_healthy(agent: Agent) -> (bool, List[str]):
     """
     Checks agent health
@@ -35,31 +31,36 @@ def is_healthy(agent: Agent) -> (bool, List[str]):
 
     output = []
     try:
+        # unknown hosts are accepted and persisted to known_hosts by the client's
+        # missing-host-key policy, so no ssh-keyscan fallback is needed here
         ssh = get_agent_ssh_client(agent)
-
-        try:
-            with ssh:
-                logger.info(f"Checking agent {agent.name}'s health")
-                for line in execute_command(ssh=ssh, setup_command=':', command=f"pwd", directory=agent.workdir):
-                    logger.info(line)
-                    output.append(line)
-                logger.info(f"Agent {agent.name} healthcheck succeeded")
-                return True, output
-        except SSHException as e:
-            if 'not found in known_hosts' in str(e):
-                # add the hostname to known_hosts and retry
-                subprocess.run(f"ssh-keyscan {agent.hostname} >> /code/config/ssh/known_hosts", shell=True)
-                with ssh:
-                    logger.info(f"Checking agent {agent.name}'s health")
-                    for line in execute_command(ssh=ssh, setup_command=':', command=f"pwd", directory=agent.workdir):
-                        logger.info(line)
-                        output.append(line)
-                    logger.info(f"Agent {agent.name} healthcheck succeeded")
-                    return True, output
-            else:
-                raise e
+        with ssh:
+            logger.info(f"Checking agent {agent.name}'s health")
+            for line in execute_command(ssh=ssh, setup_command=':', command=f"pwd", directory=agent.workdir):
+                logger.info(line)
+                output.append(line)
+            logger.info(f"Agent {agent.name} healthcheck succeeded")
+            return True, output
     except:
         msg = f"Agent {agent.name} healthcheck failed:\n{traceback.format_exc()}"
         logger.warning(msg)
         output.append(msg)
-        return False, output
\ No newline at end of file
+        return False, output
+
+
+def run_agent_healthchecks(agents: List[Agent], max_workers: int = 8) -> List[Tuple[bool, List[str]]]:
+    """
+    Checks the health of several agents concurrently. Each check blocks on an
+    SSH handshake and command round trip to an independent host, so overlapping
+    them bounds wall-clock time by the slowest host rather than the sum of all.
+
+    Args:
+        agents: The agents to check.
+        max_workers: The maximum number of concurrent checks.
+
+    Returns: Healthcheck results (in the same order as the given agents).
+    """
+
+    if not agents: return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(agents))) as executor:
+        return list(executor.map(is_healthy, agents))
\ No newline at end of file
@@ -0,0 +1,14 @@
+import orjson
+from django.http import HttpResponse
+
+
+class ORJSONResponse(HttpResponse):
+    """
+    An HTTP response serialized with orjson instead of the stdlib encoder.
+    Use this for large JSON payloads (e.g. workflow bundle lists), where
+    serialization time is a meaningful share of response latency.
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=orjson.dumps(data), **kwargs)
@@ -1,8 +1,10 @@
-import subprocess
 import logging
-from os.path import join
+import os
+from functools import lru_cache
 from pathlib import Path
 
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -10,7 +12,7 @@ logger = logging.getLogger(__name__)
 
 def get_or_create_user_keypair(username: str, overwrite: bool = False) -> str:
     """
-    Creates an RSA-protected SSH keypair for the user and returns the public key (or gets the public key if a keypair already exists).
+    Creates an Ed25519 SSH keypair for the user and returns the public key (or gets the public key if a keypair already exists).
     To overwrite a pre-existing keypair, use the `invalidate` argument.
 
     Args:
@@ -27,23 +29,53 @@ def get_or_create_user_keypair(username: str, overwrite: bool = False) -> str:
             logger.info(f"Keypair for {username} already exists, overwriting")
             public_key_path.unlink()
             private_key_path.unlink(missing_ok=True)
+            create_user_keypair(username, private_key_path, public_key_path)
         else:
             logger.info(f"Keypair for {username} already exists")
     else:
-        subprocess.run(f"ssh-keygen -b 2048 -t rsa -f {private_key_path} -N \"\"", shell=True)
-        logger.info(f"Created keypair for {username}")
+        create_user_keypair(username, private_key_path, public_key_path)
 
     with open(public_key_path, 'r') as key:
         return key.readlines()[0]
 
 
-def get_user_private_key_path(username: str) -> Path:
-    path = Path(f"{Path(settings.AGENT_KEYS).absolute()}/{username}")
+def create_user_keypair(username: str, private_key_path: Path, public_key_path: Path):
+    # generate the key in-process (Ed25519 is much faster than RSA and avoids forking an ssh-keygen subprocess)
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    private_bytes = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.OpenSSH,
+        encryption_algorithm=serialization.NoEncryption())
+    public_bytes = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.OpenSSH,
+        format=serialization.PublicFormat.OpenSSH)
+
+    write_key_file(private_key_path, private_bytes)
+    write_key_file(public_key_path, public_bytes + b'\n')
+    logger.info(f"Created keypair for {username}")
+
+
+def write_key_file(path: Path, content: bytes):
+    # write to a temp file first, then rename into place so we never leave a partially written key
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(temp_path, 'wb') as file:
+        file.write(content)
+    os.chmod(temp_path, 0o600)
+    os.replace(temp_path, path)
+
+
+@lru_cache(maxsize=None)
+def get_user_key_directory(username: str) -> Path:
+    # settings.AGENT_KEYS never changes at runtime, so resolve the directory
+    # (and create it) just once per username rather than on every path lookup
+    path = Path(settings.AGENT_KEYS).absolute() / username
     path.mkdir(exist_ok=True, parents=True)
-    return Path(join(path, f"{username}_id_rsa"))
+    return path
+
+
+def get_user_private_key_path(username: str) -> Path:
+    return get_user_key_directory(username) / f"{username}_id_rsa"
 
 
 def get_user_public_key_path(username: str) -> Path:
-    path = Path(f"{Path(settings.AGENT_KEYS).absolute()}/{username}")
-    path.mkdir(exist_ok=True, parents=True)
-    return Path(join(path, f"{username}_id_rsa.pub"))
\ No newline at end of file
+    return get_user_key_directory(username) / f"{username}_id_rsa.pub"
@@ -1,8 +1,15 @@
 import json
 import uuid
 import logging
+from functools import lru_cache
 
 import yaml
+
+try:
+    # libyaml parses several times faster than the pure-Python loader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseForbidden, HttpResponseNotFound
@@ -16,18 +23,23 @@ from plantit.miappe.models import EnvironmentParameter, ExperimentalFactor, Stud
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def load_suggestions(path: str):
+    # the suggestion files are static, so parse each at most once per process
+    with open(path, 'r') as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+
 @login_required
 @api_view(['GET'])
 def suggested_environment_parameters(request):
-    with open("plantit/miappe/suggested_environment_parameters.yaml", 'r') as file:
-        return JsonResponse({'suggested_environment_parameters': yaml.safe_load(file)})
+    return JsonResponse({'suggested_environment_parameters': load_suggestions("plantit/miappe/suggested_environment_parameters.yaml")})
 
 
 @login_required
 @api_view(['GET'])
 def suggested_experimental_factors(request):
-    with open("plantit/miappe/suggested_experimental_factors.yaml", 'r') as file:
-        return JsonResponse({'suggested_experimental_factors': yaml.safe_load(file)})
+    return JsonResponse({'suggested_experimental_factors': load_suggestions("plantit/miappe/suggested_experimental_factors.yaml")})
 
 
 @login_required
@@ -1,6 +1,5 @@
 import asyncio
 import concurrent.futures
-import json
 import logging
 import traceback
 from collections import Counter, namedtuple, OrderedDict
@@ -10,13 +9,14 @@ from typing import List, Tuple, Dict
 
 import jwt
 import numpy as np
+import orjson
 import pandas as pd
 from asgiref.sync import sync_to_async, async_to_sync
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import MultipleObjectsReturned
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import Count, Q
 from django.utils import timezone
 
 from pycyapi.cyverse.clients import CyverseClient
@@ -36,26 +36,42 @@ from plantit.datasets.models import DatasetAccessPolicy
 from plantit.tasks.models import Task, DelayedTask, RepeatingTask, TriggeredTask, TaskCounter, TaskStatus
 from plantit.users.models import Contributor, Profile, Migration, ManagedFile
 from plantit.utils.misc import del_none
-from plantit.utils.tasks import get_task_orchestrator_log_file_path, has_output_target
+from plantit.utils.tasks import get_task_orchestrator_log_file_path, has_output_target, tail_lines
 
 logger = logging.getLogger(__name__)
 
 
+def mget_json(redis, match: str) -> List[dict]:
+    """
+    Fetches and parses all cached values whose keys match the given pattern,
+    batching the reads into a single MGET rather than one GET per key.
+
+    Args:
+        redis: The Redis client
+        match: The key pattern
+
+    Returns: The parsed values
+    """
+    keys = list(redis.scan_iter(match=match, count=1000))
+    if not keys: return []
+    return [orjson.loads(value) for value in redis.mget(keys) if value is not None]
+
+
 def get_project_workflows(project: Investigation):
     redis = RedisClient.get()
-    workflows = [wf for wf in [json.loads(redis.get(key)) for key in redis.scan_iter(match='workflows/*')] if
+    workflows = [wf for wf in mget_json(redis, 'workflows/*') if
                  'projects' in wf['config'] and project.guid in wf['config']['projects']]
     return workflows
 
 
 async def refresh_online_users_workflow_cache():
-    users = await sync_to_async(User.objects.all)()
-    online = await sync_to_async(filter_online)(users)
+    online = await sync_to_async(filter_online)()
     logger.info(f"Refreshing workflow cache for {len(online)} online user(s)")
-    for user in online:
-        profile = await sync_to_async(Profile.objects.get)(user=user)
-        if profile.github_username is not None and profile.github_username != '':
-            await refresh_user_workflow_cache(profile.github_username)
+    profiles = [await get_user_django_profile(user) for user in online]
+    # each refresh spends its time waiting on the GitHub API, so overlap them
+    await asyncio.gather(*[refresh_user_workflow_cache(profile.github_username)
+                           for profile in profiles
+                           if profile.github_username is not None and profile.github_username != ''])
 
 
 @sync_to_async
@@ -63,11 +79,28 @@ def is_featured(owner, name, branch):
     return FeaturedWorkflow.objects.filter(owner=owner, name=name, branch=branch).exists()
 
 
+def get_workflow_keys(owner: str) -> set:
+    """
+    Gets the workflow cache keys for the given user or organization from the
+    per-owner index set (SCAN with a MATCH filter walks the entire keyspace,
+    so we only fall back to it to seed a missing index).
+
+    :param owner: The GitHub user or organization
+    :return: The owner's workflow cache keys
+    """
+
+    redis = RedisClient.get()
+    index_key = f"workflows_index/{owner}"
+    if redis.exists(index_key):
+        return {key.decode('utf-8') for key in redis.smembers(index_key)}
+    return {key.decode('utf-8') for key in redis.scan_iter(match=f"workflows/{owner}/*", count=1000)}
+
+
 async def refresh_user_workflow_cache(github_username: str):
     if github_username is None or github_username == '': raise ValueError(f"No GitHub username provided")
 
     try:
-        profile = await sync_to_async(Profile.objects.get)(github_username=github_username)
+        profile = await get_profile_async(github_username=github_username)
         user = await get_profile_user(profile)
     except MultipleObjectsReturned:
         logger.warning(f"Multiple users bound to Github user {github_username}!")
@@ -77,7 +110,7 @@ async def refresh_user_workflow_cache(github_username: str):
         return
 
     # scrape GitHub to synchronize repos and workflow config
-    profile = await sync_to_async(Profile.objects.get)(user=user)
+    profile = await get_user_django_profile(user)
     workflows = await github.list_connectable_repos_by_owner(github_username, profile.github_token)
 
     # update the cache, first removing workflows that no longer exist
@@ -85,19 +118,21 @@ async def refresh_user_workflow_cache(github_username: str):
     removed = 0
     updated = 0
     added = 0
-    old_keys = [key.decode('utf-8') for key in redis.scan_iter(match=f"workflows/{github_username}/*")]
-    new_keys = [f"workflows/{github_username}/{wf['repo']['name']}/{wf['branch']['name']}" for wf in workflows]
+    old_keys = get_workflow_keys(github_username)
+    new_keys = {f"workflows/{github_username}/{wf['repo']['name']}/{wf['branch']['name']}" for wf in workflows}
+
+    pipe = redis.pipeline()
     for old_key in old_keys:
         # invalidate submission config cache
         config_key = f"workflow_configs/{user.username}/{old_key.partition('/')[2]}"
         if redis.exists(config_key):
             logger.info(f"Removing cached workflow configuration {config_key}")
-            redis.delete(config_key)
+            pipe.delete(config_key)
 
         if old_key not in new_keys:
             logger.debug(f"Removing user workflow {old_key}")
             removed += 1
-            redis.delete(old_key)
+            pipe.delete(old_key)
         else:
             logger.debug(f"Updating user workflow {old_key}")
             updated += 1
@@ -111,22 +146,32 @@ async def refresh_user_workflow_cache(github_username: str):
         if key not in old_keys:
             logger.debug(f"Adding user workflow {key}")
             added += 1
-        redis.set(key, json.dumps(del_none(wf)))
-
-    redis.set(f"workflows_updated/{github_username}", timezone.now().timestamp())
+        pipe.set(key, orjson.dumps(del_none(wf)))
+
+    # rebuild the per-owner key index so the next refresh doesn't have to scan the keyspace
+    index_key = f"workflows_index/{github_username}"
+    pipe.delete(index_key)
+    if new_keys: pipe.sadd(index_key, *new_keys)
+    # drop the pre-serialized bundle lists so they're rebuilt from fresh bundles
+    pipe.delete(f"workflows_list/{github_username}", 'public_workflows_list')
+    pipe.set(f"workflows_updated/{github_username}", timezone.now().timestamp())
+    pipe.execute()
     logger.info(
         f"{len(workflows)} workflow(s) now in GitHub user's {github_username}'s workflow cache (added {added}, updated {updated}, removed {removed})")
 
 
 async def refresh_online_user_orgs_workflow_cache():
-    users = await sync_to_async(User.objects.all)()
-    online = await sync_to_async(filter_online)(users)
+    online = await sync_to_async(filter_online)()
+    refreshes = dict()  # refresh each organization once even if several members are online
     for user in online:
-        profile = await sync_to_async(Profile.objects.get)(user=user)
-        github_organizations = await get_user_github_organizations(user)
-        logger.info(f"Refreshing workflow cache for online user {user.username}'s {len(online)} organizations")
+        profile = await get_user_django_profile(user)
+        github_organizations = await get_user_github_organizations(profile)
+        logger.info(f"Refreshing workflow cache for online user {user.username}'s {len(github_organizations)} organizations")
         for org in github_organizations:
-            await refresh_org_workflow_cache(org['login'], profile.github_token)
+            if org['login'] not in refreshes:
+                refreshes[org['login']] = refresh_org_workflow_cache(org['login'], profile.github_token)
+    # as above, overlap the GitHub API round trips
+    await asyncio.gather(*refreshes.values())
 
 
 async def refresh_org_workflow_cache(org_name: str, github_token: str):
@@ -138,13 +183,15 @@ async def refresh_org_workflow_cache(org_name: str, github_token: str):
     removed = 0
     updated = 0
     added = 0
-    old_keys = [key.decode('utf-8') for key in redis.scan_iter(match=f"workflows/{org_name}/*")]
-    new_keys = [f"workflows/{org_name}/{wf['repo']['name']}/{wf['branch']['name']}" for wf in workflows]
+    old_keys = get_workflow_keys(org_name)
+    new_keys = {f"workflows/{org_name}/{wf['repo']['name']}/{wf['branch']['name']}" for wf in workflows}
+
+    pipe = redis.pipeline()
     for old_key in old_keys:
         if old_key not in new_keys:
             logger.debug(f"Removing org workflow {old_key}")
             removed += 1
-            redis.delete(old_key)
+            pipe.delete(old_key)
         else:
             logger.debug(f"Updating org workflow {old_key}")
             updated += 1
@@ -158,27 +205,72 @@ async def refresh_org_workflow_cache(org_name: str, github_token: str):
         if key not in old_keys:
             logger.debug(f"Adding org workflow {key}")
             added += 1
-        redis.set(key, json.dumps(del_none(wf)))
-
-    redis.set(f"workflows_updated/{org_name}", timezone.now().timestamp())
+        pipe.set(key, orjson.dumps(del_none(wf)))
+
+    # rebuild the per-owner key index so the next refresh doesn't have to scan the keyspace
+    index_key = f"workflows_index/{org_name}"
+    pipe.delete(index_key)
+    if new_keys: pipe.sadd(index_key, *new_keys)
+    # drop the pre-serialized bundle lists so they're rebuilt from fresh bundles
+    pipe.delete(f"workflows_list/{org_name}", 'public_workflows_list')
+    pipe.set(f"workflows_updated/{org_name}", timezone.now().timestamp())
+    pipe.execute()
     logger.info(
         f"{len(workflows)} workflow(s) now in GitHub organization {org_name}'s workflow cache (added {added}, updated {updated}, removed {removed})")
 
 
 def list_public_workflows() -> List[dict]:
     redis = RedisClient.get()
-    workflows = [wf for wf in [json.loads(redis.get(key)) for key in redis.scan_iter(match='workflows/*')] if
+    workflows = [wf for wf in mget_json(redis, 'workflows/*') if
                  'public' in wf['config'] and wf['config']['public']]
     return workflows
 
 
+# lifetime for the pre-serialized bundle-list cache entries below; entries are
+# also dropped eagerly whenever an owner's workflow cache is refreshed
+WORKFLOWS_LIST_CACHE_SECONDS = 3600
+
+
+def list_public_workflows_serialized() -> bytes:
+    """
+    Like `list_public_workflows`, but returns the list pre-serialized as JSON,
+    cached under a single key so the hot read path is one GET with no
+    per-bundle decode/encode round trip.
+    """
+
+    redis = RedisClient.get()
+    cached = redis.get('public_workflows_list')
+    if cached is not None: return cached
+    serialized = orjson.dumps(list_public_workflows())
+    redis.setex('public_workflows_list', WORKFLOWS_LIST_CACHE_SECONDS, serialized)
+    return serialized
+
+
+def list_user_workflows_serialized(owner: str) -> bytes:
+    """
+    Like `list_user_workflows`, but returns the owner's list pre-serialized as
+    JSON, cached under a single key (see `list_public_workflows_serialized`).
+    """
+
+    redis = RedisClient.get()
+    cached = redis.get(f"workflows_list/{owner}")
+    if cached is not None: return cached
+    serialized = orjson.dumps(list_user_workflows(owner))
+    redis.setex(f"workflows_list/{owner}", WORKFLOWS_LIST_CACHE_SECONDS, serialized)
+    return serialized
+
+
 def list_user_workflows(owner: str) -> List[dict]:
+    # the per-owner index set knows this owner's keys, so no keyspace scan
     redis = RedisClient.get()
-    return [json.loads(redis.get(key)) for key in redis.scan_iter(match=f"workflows/{owner}/*")]
+    keys = list(get_workflow_keys(owner))
+    if not keys: return []
+    return [orjson.loads(wf) for wf in redis.mget(keys) if wf is not None]
 
 
 async def list_user_org_workflows(user: User) -> Dict[str, List[dict]]:
-    orgs = await get_user_github_organizations(user)
+    profile = await get_user_django_profile(user)
+    orgs = await get_user_github_organizations(profile)
     workflows = dict()
     for org in orgs: workflows[org['login']] = await sync_to_async(list_org_workflows)(org['login'])
     return workflows
@@ -190,14 +282,14 @@ def list_user_project_workflows(user: User) -> Dict[str, List[dict]]:
 
 
 def list_org_workflows(organization: str) -> List[dict]:
-    redis = RedisClient.get()
-    return [json.loads(redis.get(key)) for key in redis.scan_iter(match=f"workflows/{organization}/*")]
+    # users and organizations share the same cache and index layout
+    return list_user_workflows(organization)
 
 
 def list_project_workflows(project: Investigation) -> List[dict]:
     redis = RedisClient.get()
     proj_dict = project_to_dict(project)
-    return [json.loads(wf) for wf in [redis.get(key) for key in [f"workflows/{name}" for name in proj_dict['workflows']]] if wf is not None]
+    return [orjson.loads(wf) for wf in [redis.get(key) for key in [f"workflows/{name}" for name in proj_dict['workflows']]] if wf is not None]
 
 
 async def get_workflow(
@@ -208,8 +300,7 @@ async def get_workflow(
         cyverse_token: str,
         invalidate: bool = False) -> dict:
     redis = RedisClient.get()
-    updated = redis.get(f"workflows_updated/{owner}")
-    workflow = redis.get(f"workflows/{owner}/{name}/{branch}")
+    updated, workflow = redis.mget(f"workflows_updated/{owner}", f"workflows/{owner}/{name}/{branch}")
 
     if updated is None or workflow is None or invalidate:
         bundle = await github.get_repo_bundle(owner, name, branch, github_token, cyverse_token)
@@ -220,39 +311,88 @@ async def get_workflow(
             'branch': branch,
             'featured': FeaturedWorkflow.objects.filter(owner=owner, name=name, branch=branch).exists()
         }
-        redis.set(f"workflows/{owner}/{name}/{branch}", json.dumps(del_none(workflow)))
+        key = f"workflows/{owner}/{name}/{branch}"
+        pipe = redis.pipeline()
+        pipe.set(key, orjson.dumps(del_none(workflow)))
+        # keep the per-owner index covering every cached workflow key (listings
+        # read only the index now), and drop the pre-serialized lists so
+        # they're rebuilt with this bundle included
+        pipe.sadd(f"workflows_index/{owner}", key)
+        pipe.delete(f"workflows_list/{owner}", 'public_workflows_list')
+        pipe.execute()
         return workflow
     else:
-        return json.loads(workflow)
+        return orjson.loads(workflow)
 
 
 def list_users(invalidate: bool = False) -> List[dict]:
     redis = RedisClient.get()
-    updated = redis.get(f"users_updated")
+    # one round trip fetches the freshness timestamp and the serialized list together
+    updated, cached = redis.mget(f"users_updated", f"users_list")
 
     # repopulate if empty or invalidation requested
-    if updated is None or len(list(redis.scan_iter(match=f"users/*"))) == 0 or invalidate:
-        refresh_user_cache()
-    else:
-        age = (datetime.now() - datetime.fromtimestamp(float(updated)))
-        age_secs = age.total_seconds()
-        max_secs = (int(settings.USERS_REFRESH_MINUTES) * 60)
+    if updated is None or cached is None or invalidate:
+        return refresh_user_cache()
 
-        # otherwise only if stale
-        if age_secs > max_secs:
-            logger.info(f"User cache is stale ({age_secs}s old, {age_secs - max_secs}s past limit), repopulating")
-            refresh_user_cache()
+    age = (datetime.now() - datetime.fromtimestamp(float(updated)))
+    age_secs = age.total_seconds()
+    max_secs = (int(settings.USERS_REFRESH_MINUTES) * 60)
 
-    return [json.loads(redis.get(key)) for key in redis.scan_iter(match=f"users/*")]
+    # otherwise only if stale
+    if age_secs > max_secs:
+        logger.info(f"User cache is stale ({age_secs}s old, {age_secs - max_secs}s past limit), repopulating")
+        return refresh_user_cache()
 
+    return orjson.loads(cached)
 
-def refresh_user_cache():
+
+def refresh_user_cache() -> List[dict]:
     logger.info(f"Refreshing user cache")
     redis = RedisClient.get()
-    for user in list(User.objects.all().exclude(profile__isnull=True)):
+
+    # join the profile in the same SQL so get_user_bundle doesn't issue a query
+    # per user, and queue the writes on a pipeline for a single round trip
+    bundles = []
+    pipe = redis.pipeline()
+    for user in User.objects.exclude(profile__isnull=True).select_related('profile').iterator(chunk_size=500):
         bundle = get_user_bundle(user)
-        redis.set(f"users/{user.username}", json.dumps(bundle))
-    RedisClient.get().set(f"users_updated", timezone.now().timestamp())
+        bundles.append(bundle)
+        pipe.set(f"users/{user.username}", orjson.dumps(bundle))
+    pipe.set(f"users_list", orjson.dumps(bundles))
+    pipe.set(f"users_updated", timezone.now().timestamp())
+    pipe.execute()
+    return bundles
+
+
+# how long to cache GitHub profile/organization lookups
+GITHUB_INFO_CACHE_SECONDS = 600
+
+
+async def get_user_github_info(profile: Profile) -> (dict, List[dict]):
+    return await asyncio.gather(get_user_github_profile(profile), get_user_github_organizations(profile))
+
+
+def get_user_github_info_cached(profile: Profile) -> (dict, List[dict]):
+    """
+    Gets the user's GitHub profile and organizations, caching both briefly in Redis
+    so back-to-back bundle rebuilds don't re-hit the GitHub API.
+
+    :param profile: The user's profile
+    :return: The user's GitHub profile and organizations
+    """
+
+    redis = RedisClient.get()
+    profile_key = f"github_profiles/{profile.github_username}"
+    orgs_key = f"github_orgs/{profile.github_username}"
+    cached_profile, cached_orgs = redis.mget(profile_key, orgs_key)
+    if cached_profile is not None and cached_orgs is not None:
+        return orjson.loads(cached_profile), orjson.loads(cached_orgs)
+
+    # cache is cold (or partially cold), fetch both concurrently
+    github_profile, github_organizations = async_to_sync(get_user_github_info)(profile)
+    redis.setex(profile_key, GITHUB_INFO_CACHE_SECONDS, orjson.dumps(github_profile))
+    redis.setex(orgs_key, GITHUB_INFO_CACHE_SECONDS, orjson.dumps(github_organizations))
+    return github_profile, github_organizations
 
 
 def has_github_info(profile: Profile):
@@ -263,7 +403,7 @@ def has_github_info(profile: Profile):
 
 
 def get_user_bundle(user: User):
-    profile = Profile.objects.get(user=user)
+    profile = user.profile
     if not has_github_info(profile):
         return {
             'username': user.username,
@@ -273,9 +413,8 @@ def get_user_bundle(user: User):
     else:
         redis = RedisClient.get()
         cached = redis.get(f"users/{user.username}")
-        if cached is not None: return json.loads(cached)
-        github_profile = async_to_sync(get_user_github_profile)(user)
-        github_organizations = async_to_sync(get_user_github_organizations)(user)
+        if cached is not None: return orjson.loads(cached)
+        github_profile, github_organizations = get_user_github_info_cached(profile)
         bundle = {
             'username': user.username,
             'first_name': user.first_name,
@@ -288,7 +427,7 @@ def get_user_bundle(user: User):
             'first_name': user.first_name,
             'last_name': user.last_name,
         }
-        redis.set(f"users/{user.username}", json.dumps(bundle))
+        redis.set(f"users/{user.username}", orjson.dumps(bundle))
         return bundle
 
 
@@ -343,13 +482,26 @@ def dataset_access_policy_to_dict(policy: DatasetAccessPolicy):
     }
 
 
+# how long to cache orchestrator log tails between task serializations
+ORCHESTRATOR_LOGS_CACHE_SECONDS = 5
+
+
 def task_to_dict(task: Task) -> dict:
-    orchestrator_log_file_path = get_task_orchestrator_log_file_path(task)
-    if Path(orchestrator_log_file_path).is_file():
-        with open(orchestrator_log_file_path, 'r') as log:
-            orchestrator_logs = [line.strip() for line in log.readlines()[-int(1000000):]]
+    # fetch cached results and log tail in one round trip; the log cache key
+    # includes the task's last-updated time so stale tails self-invalidate
+    redis = RedisClient.get()
+    logs_key = f"orchestrator_logs/{task.guid}/{task.updated.timestamp()}"
+    results, cached_logs = redis.mget(f"results/{task.guid}", logs_key)
+
+    if cached_logs is not None:
+        orchestrator_logs = orjson.loads(cached_logs)
     else:
-        orchestrator_logs = []
+        orchestrator_log_file_path = get_task_orchestrator_log_file_path(task)
+        if Path(orchestrator_log_file_path).is_file():
+            orchestrator_logs = [line.strip() for line in tail_lines(orchestrator_log_file_path)]
+        else:
+            orchestrator_logs = []
+        redis.setex(logs_key, ORCHESTRATOR_LOGS_CACHE_SECONDS, orjson.dumps(orchestrator_logs))
 
     # try:
     #     AgentAccessPolicy.objects.get(user=task.user, agent=task.agent, role__in=[AgentRole.admin, AgentRole.guest])
@@ -357,8 +509,6 @@ def task_to_dict(task: Task) -> dict:
     # except:
     #     can_restart = False
 
-    results = RedisClient.get().get(f"results/{task.guid}")
-
     return {
         # 'can_restart': can_restart,
         'guid': task.guid,
@@ -405,7 +555,7 @@ def task_to_dict(task: Task) -> dict:
         'cleaned_up': task.cleaned_up,
         'transferred': task.transferred,
         'transfer_path': task.transfer_path,
-        'output_files': json.loads(results) if results is not None else [],
+        'output_files': orjson.loads(results) if results is not None else [],
         'job_id': task.job_id,
         'job_status': task.job_status,
         # 'job_walltime': task.job_consumed_walltime,
@@ -472,9 +622,23 @@ def triggered_task_to_dict(task: RepeatingTask):
     }
 
 
+# optional free-text study attributes, serialized as None when empty
+_STUDY_STR_ATTRS = (
+    'site_name',
+    'experimental_design_description',
+    'experimental_design_type',
+    'experimental_design_map',
+    'observation_unit_level_hierarchy',
+    'observation_unit_description',
+    'growth_facility_description',
+    'growth_facility_type',
+    'cultural_practices',
+)
+
+
 def study_to_dict(study: Study, project: Investigation) -> dict:
     team = [person_to_dict(person, 'Researcher') for person in study.team.all()]
-    return {
+    mapped = {
         'project_title': project.title,
         'project_owner': project.owner.username,
         'guid': study.guid,
@@ -484,25 +648,22 @@ def study_to_dict(study: Study, project: Investigation) -> dict:
         'end_date': study.end_date,
         'contact_institution': study.contact_institution,
         'country': study.country,
-        'site_name': study.site_name if study.site_name != '' else None,
         'latitude': study.latitude,
         'longitude': study.longitude,
         'altitude': study.altitude,
         'altitude_units': study.altitude_units,
-        'experimental_design_description': study.experimental_design_description if study.experimental_design_description != '' else None,
-        'experimental_design_type': study.experimental_design_type if study.experimental_design_type != '' else None,
-        'experimental_design_map': study.experimental_design_map if study.experimental_design_map != '' else None,
-        'observation_unit_level_hierarchy': study.observation_unit_level_hierarchy if study.observation_unit_level_hierarchy != '' else None,
-        'observation_unit_description': study.observation_unit_description if study.observation_unit_description != '' else None,
-        'growth_facility_description': study.growth_facility_description if study.growth_facility_description != '' else None,
-        'growth_facility_type': study.growth_facility_type if study.growth_facility_type != '' else None,
-        'cultural_practices': study.cultural_practices if study.cultural_practices != '' else None,
         'team': team,
     }
+    # one attribute lookup per optional field instead of a ternary touching each twice
+    mapped.update((attr, getattr(study, attr) or None) for attr in _STUDY_STR_ATTRS)
+    return mapped
 
 
 def project_to_dict(project: Investigation) -> dict:
-    studies = [study_to_dict(study, project) for study in Study.objects.select_related().filter(investigation=project)]
+    # prefetch study team members (and their profiles, for affiliations) so
+    # serializing each study doesn't issue its own membership queries
+    studies = [study_to_dict(study, project) for study in
+               Study.objects.filter(investigation=project).prefetch_related('team__profile')]
     team = [person_to_dict(person, 'Researcher') for person in project.team.all()]
     return {
         'guid': project.guid,
@@ -519,11 +680,13 @@ def project_to_dict(project: Investigation) -> dict:
 
 
 def get_user_projects(user: User):
-    return [project_to_dict(project) for project in Investigation.objects.filter(owner=user)]
+    projects = Investigation.objects.filter(owner=user).select_related('owner').prefetch_related('team__profile')
+    return [project_to_dict(project) for project in projects]
 
 
 def get_projects(team=None):
-    return [project_to_dict(project) for project in (Investigation.objects.all() if team is None else Investigation.objects.filter(team__username=team))]
+    projects = Investigation.objects.all() if team is None else Investigation.objects.filter(team__username=team)
+    return [project_to_dict(project) for project in projects.select_related('owner').prefetch_related('team__profile')]
 
 
 def list_user_projects(user: User):
@@ -546,10 +709,11 @@ def get_user_cyverse_profile(user: User) -> dict:
         user.profile.institution = profile['institution']
         altered = True
 
-    # only write to DB if we change anything (avoids a network call if we don't need one)
+    # only write to DB if we change anything (avoids a network call if we don't need one),
+    # and only the columns that changed
     if altered:
-        user.profile.save()
-        user.save()
+        user.profile.save(update_fields=['institution'])
+        user.save(update_fields=['first_name', 'last_name'])
 
     return profile
 
@@ -585,29 +749,33 @@ def refresh_user_cyverse_tokens(user: User):
         logger.error(f"Failed to refresh CyVerse access token for {user.username}: {traceback.format_exc()}")
         return
 
+    decoded = jwt.decode(access_token, options={
+        'verify_signature': False,
+        'verify_aud': False,
+        'verify_iat': False,
+        'verify_exp': False,
+        'verify_iss': False
+    })
+
     user.profile.cyverse_access_token = access_token
     user.profile.cyverse_refresh_token = refresh_token
-    user.profile.save()
-    user.save()
-
+    user.profile.cyverse_token_exp = datetime.fromtimestamp(decoded['exp'], timezone.utc)
+    user.profile.save(update_fields=['cyverse_access_token', 'cyverse_refresh_token', 'cyverse_token_exp'])
 
-async def get_user_github_profile(user: User) -> dict:
-    profile = await sync_to_async(Profile.objects.get)(user=user)
 
+async def get_user_github_profile(profile: Profile) -> dict:
     # if no GitHub auth token, the user hasn't linked their GitHub account yet
     if profile.github_token is None or profile.github_token == '':
-        logger.warning(f"No GitHub token for user {user.username}")
+        logger.warning(f"No GitHub token for GitHub user {profile.github_username}")
         return dict()
 
     return await github.get_profile(profile.github_username, profile.github_token)
 
 
-async def get_user_github_organizations(user: User) -> List[dict]:
-    profile = await sync_to_async(Profile.objects.get)(user=user)
-
+async def get_user_github_organizations(profile: Profile) -> List[dict]:
     # if no GitHub auth token, the user hasn't linked their GitHub account yet
     if profile.github_token is None or profile.github_token == '':
-        logger.warning(f"No GitHub token for user {user.username}")
+        logger.warning(f"No GitHub token for GitHub user {profile.github_username}")
         return []
 
     return await github.list_user_organizations(profile.github_username, profile.github_token)
@@ -615,7 +783,8 @@ async def get_user_github_organizations(user: User) -> List[dict]:
 
 def get_agents(user: User):
     # only return public agents and agents the requesting user is authorized to access
-    agents = [agent for agent in Agent.objects.all() if agent.public or agent.user == user or user.username in [u.username for u in agent.users_authorized.all()]]
+    # (filtered in one query rather than scanning each agent's authorized-user list)
+    agents = Agent.objects.filter(Q(public=True) | Q(user=user) | Q(users_authorized=user)).distinct()
     return [agent_to_dict(agent, user.username) for agent in agents]
 
 
@@ -658,7 +827,7 @@ def filter_tasks(user: User, completed: bool = None):
         tasks = Task.objects.filter(user=user, completed__isnull=False)
     else:
         tasks = Task.objects.filter(user=user)
-    return list(tasks)
+    return list(tasks.select_related('agent', 'project'))
 
 
 @sync_to_async
@@ -671,33 +840,34 @@ def filter_agents(user: User = None, guest: User = None):
         raise ValueError(f"Expected either user or guest to be None")
 
 
-def filter_online(users: List[User]) -> List[User]:
+def filter_online() -> List[User]:
     """
     Selects only those users currently online by checking their Terrain token expiry times
 
-    :param users: The list of users
     :return: The logged-in users
     """
 
-    online = []
-    for user in users:
-        decoded_token = jwt.decode(user.profile.cyverse_access_token, options={
-            'verify_signature': False,
-            'verify_aud': False,
-            'verify_iat': False,
-            'verify_exp': False,
-            'verify_iss': False
-        })
-        exp = datetime.fromtimestamp(decoded_token['exp'], timezone.utc)
-        now = datetime.now(tz=timezone.utc)
-
-        if now > exp:
-            print(f"Session for {decoded_token['preferred_username']} expired at {exp.isoformat()}")
-        else:
-            print(f"Session for {decoded_token['preferred_username']} valid until {exp.isoformat()}")
-            online.append(user)
-
-    return online
+    # sessions established before expiry times were cached on the Profile have a
+    # token but no cached expiry; backfill those by decoding the token once, so
+    # the query below doesn't drop them (this empties out after the first pass)
+    for profile in Profile.objects.filter(cyverse_token_exp__isnull=True).exclude(cyverse_access_token=''):
+        try:
+            decoded = jwt.decode(profile.cyverse_access_token, options={
+                'verify_signature': False,
+                'verify_aud': False,
+                'verify_iat': False,
+                'verify_exp': False,
+                'verify_iss': False
+            })
+            profile.cyverse_token_exp = datetime.fromtimestamp(decoded['exp'], timezone.utc)
+        except Exception:
+            # undecodable token: mark it expired rather than retrying every call
+            profile.cyverse_token_exp = datetime.fromtimestamp(0, timezone.utc)
+        profile.save(update_fields=['cyverse_token_exp'])
+
+    # token expiry times are cached on the Profile whenever tokens are issued or refreshed,
+    # so a single indexed query does the filtering (no per-user JWT decoding)
+    return list(User.objects.filter(profile__cyverse_token_exp__gt=timezone.now()).select_related('profile'))
 
 
 @sync_to_async
@@ -718,7 +888,7 @@ def notification_to_dict(notification: Notification) -> dict:
 def get_last_task_config(username, owner, name, branch):
     redis = RedisClient.get()
     last_config = redis.get(f"workflow_configs/{username}/{owner}/{name}/{branch}")
-    return None if last_config is None else json.loads(last_config)
+    return None if last_config is None else orjson.loads(last_config)
 
 
 @sync_to_async
@@ -752,6 +922,11 @@ def get_user_django_profile(user: User):
     return profile
 
 
+# wrapped once at import time: sync_to_async builds a new adapter closure
+# on every call, so inline wrapping adds overhead to hot request paths
+get_profile_async = sync_to_async(Profile.objects.get)
+
+
 def person_to_dict(user: User, role: str) -> dict:
     return {
         'name': f"{user.first_name} {user.last_name}",
@@ -796,7 +971,7 @@ def count_institutions():
 
 def get_institutions(invalidate: bool = False) -> dict:
     redis = RedisClient.get()
-    cached = list(redis.scan_iter(match=f"institutions/*"))
+    cached = list(redis.scan_iter(match=f"institutions/*", count=1000))
     institutions = dict()
 
     if invalidate:
@@ -843,11 +1018,12 @@ def get_institutions(invalidate: bool = False) -> dict:
                     'geocode': feature
                 }
 
-        for name, institution in institutions.items(): redis.set(f"institutions/{name}", json.dumps(institution))
+        for name, institution in institutions.items(): redis.set(f"institutions/{name}", orjson.dumps(institution))
     else:
-        for institution in cached:
-            if institution is not None:
-                institutions[institution.decode('utf-8')] = json.loads(redis.get(institution))
+        if cached:
+            for key, value in zip(cached, redis.mget(cached)):
+                if value is not None:
+                    institutions[key.decode('utf-8')] = orjson.loads(value)
 
     return institutions
 
@@ -858,8 +1034,8 @@ def get_total_counts(invalidate: bool = False) -> dict:
 
     if cached is None or invalidate:
         users = User.objects.count()
-        online = len(filter_online(User.objects.all()))  # TODO store this in the DB each time the user logs in
-        wfs = [json.loads(redis.get(key)) for key in redis.scan_iter(match='workflows/*')]
+        online = len(filter_online())
+        wfs = mget_json(redis, 'workflows/*')
         devs = list(set([wf['repo']['owner']['login'] for wf in wfs]))
         workflows = len(wfs)
         developers = len(devs)
@@ -878,9 +1054,9 @@ def get_total_counts(invalidate: bool = False) -> dict:
             'institutions': institutions
         }
 
-        redis.set("stats_counts", json.dumps(counts))
+        redis.set("stats_counts", orjson.dumps(counts))
     else:
-        counts = json.loads(cached)
+        counts = orjson.loads(cached)
 
     return counts
 
@@ -903,9 +1079,9 @@ def get_aggregate_timeseries(invalidate: bool = False) -> dict:
             'workflows_usage': workflows_usage,
         }
 
-        redis.set("total_timeseries", json.dumps(series))
+        redis.set("total_timeseries", orjson.dumps(series))
     else:
-        series = json.loads(cached)
+        series = orjson.loads(cached)
 
     return series
 
@@ -924,9 +1100,9 @@ def get_user_timeseries(user: User, invalidate: bool = False) -> dict:
             'workflows_usage': workflows_usage
         }
 
-        redis.set(f"user_timeseries/{user.username}", json.dumps(series))
+        redis.set(f"user_timeseries/{user.username}", orjson.dumps(series))
     else:
-        series = json.loads(cached)
+        series = orjson.loads(cached)
 
     return series
 
@@ -964,7 +1140,8 @@ def get_tasks_usage_timeseries(interval_seconds: int = 600, user: User = None) -
     series_keys = list(series.keys())
     series_frame = pd.DataFrame({'X': series_keys, 'Y': list(series.values())})
     smoothed_frame = loess.regress(series_frame, bandwidth=int(interval_seconds / 5), num_pts=int(len(series_keys) / 2))
-    series = {datetime.fromtimestamp(row['X']).isoformat(): row['Y'] for i, row in smoothed_frame.iterrows()}
+    # cast to plain floats: orjson refuses the frame's np.float64 scalars
+    series = {datetime.fromtimestamp(row['X']).isoformat(): float(row['Y']) for i, row in smoothed_frame.iterrows()}
 
     return series
 
@@ -990,9 +1167,9 @@ def get_workflow_usage_timeseries(owner: str, name: str, branch: str, invalidate
             if timestamp not in series: series[timestamp] = 0
             series[timestamp] = series[timestamp] + 1
 
-        redis.set(f"workflow_timeseries/{owner}/{name}/{branch}", json.dumps(series))
+        redis.set(f"workflow_timeseries/{owner}/{name}/{branch}", orjson.dumps(series))
     else:
-        series = json.loads(cached)
+        series = orjson.loads(cached)
 
     return series
 
@@ -1085,9 +1262,12 @@ async def get_user_statistics(user: User, invalidate: bool = False) -> dict:
     cached = redis.get(f"stats/{user.username}")
 
     if cached is None or invalidate:
-        profile = await sync_to_async(Profile.objects.get)(user=user)
-        all_tasks = await filter_tasks(user=user)
-        completed_tasks = await filter_tasks(user=user, completed=True)
+        # the profile, task and agent queries are independent, so run them concurrently
+        profile, all_tasks, agents = await asyncio.gather(
+            get_user_django_profile(user),
+            filter_tasks(user=user),
+            filter_agents(user=user))
+        completed_tasks = [task for task in all_tasks if task.completed is not None]
         total_tasks = len(all_tasks)
         total_time = sum([(task.completed - task.created).total_seconds() for task in completed_tasks])
         owned_workflows = [
@@ -1098,18 +1278,27 @@ async def get_user_statistics(user: User, invalidate: bool = False) -> dict:
         used_workflows_counter = Counter(used_workflows)
         unique_used_workflows = list(np.unique(used_workflows))
         owned_agents = [(await sync_to_async(agent_to_dict)(agent, user.username))['name'] for agent in
-                        [agent for agent in await filter_agents(user=user) if agent is not None]]
+                        [agent for agent in agents if agent is not None]]
         guest_agents = [(await sync_to_async(agent_to_dict)(agent, user.username))['name'] for agent in
-                        [agent for agent in await filter_agents(user=user) if agent is not None]]
+                        [agent for agent in agents if agent is not None]]
+        # task agents and projects are preloaded by filter_tasks via select_related, so no per-task queries here
         used_agents = [(await sync_to_async(agent_to_dict)(agent, user.username))['name'] for agent in
-                       [a for a in [await get_task_agent(task) for task in all_tasks] if a is not None]]
+                       [task.agent for task in all_tasks if task.agent is not None]]
         used_projects = [(await sync_to_async(project_to_dict)(project)) for project in
-                         [p for p in [await get_task_project(task) for task in all_tasks] if p is not None]]
+                         [task.project for task in all_tasks if task.project is not None]]
         used_agents_counter = Counter(used_agents)
         used_projects_counter = Counter([f"{project['guid']} ({project['title']})" for project in used_projects])
         unique_used_agents = list(np.unique(used_agents))
         tasks_running = await sync_to_async(get_tasks_usage_timeseries)(600, user)
 
+        # compute status values and labels in a single pass over the task history
+        task_status_values = []
+        task_status_labels = []
+        for task in all_tasks:
+            succeeded = task.status == 'success'
+            task_status_values.append(1 if succeeded else 0)
+            task_status_labels.append('SUCCESS' if succeeded else 'FAILURE')
+
         stats = {
             'total_tasks': total_tasks,
             'total_task_seconds': total_time,
@@ -1127,16 +1316,16 @@ async def get_user_statistics(user: User, invalidate: bool = False) -> dict:
                 'labels': list(dict(used_projects_counter).keys()),
             },
             'task_status': {
-                'values': [1 if task.status == 'success' else 0 for task in all_tasks],
-                'labels': ['SUCCESS' if task.status == 'success' else 'FAILURE' for task in all_tasks],
+                'values': task_status_values,
+                'labels': task_status_labels,
             },
             'owned_agents': owned_agents,
             'guest_agents': guest_agents,
             'institution': profile.institution,
             'tasks_running': tasks_running
         }
-        redis.set(f"stats/{user.username}", json.dumps(stats))
-    else: stats = json.loads(cached)
+        redis.set(f"stats/{user.username}", orjson.dumps(stats))
+    else: stats = orjson.loads(cached)
     return stats
 
 
@@ -1,5 +1,11 @@
 import redis
 
+# one process-wide connection pool, bounded to worker concurrency; the client
+# (and any pipelines it creates) checks connections out of this pool instead
+# of growing an unbounded one. Responses stay raw bytes (the default) so
+# orjson can consume them directly.
+_POOL = redis.ConnectionPool(host='redis', port=6379, db=0, max_connections=64)
+
 
 class RedisClient:
     __client = None
@@ -7,5 +13,5 @@ class RedisClient:
     @staticmethod
     def get():
         if RedisClient.__client is None:
-            RedisClient.__client = redis.Redis('redis', 6379, db=0)
+            RedisClient.__client = redis.Redis(connection_pool=_POOL)
         return RedisClient.__client
@@ -6,6 +6,10 @@ from plantit.utils.tasks import format_bind_mount
 
 logger = logging.getLogger(__name__)
 
+# uppercases ASCII letters and replaces spaces with underscores in one C-level pass
+# (the equivalent .upper().replace(' ', '_') allocates two intermediate strings per key)
+_KEY_TABLE = str.maketrans({' ': '_', **{chr(c): chr(c - 32) for c in range(ord('a'), ord('z') + 1)}})
+
 
 def compose_singularity_invocation(
         work_dir: str,
@@ -20,38 +24,38 @@ def compose_singularity_invocation(
         docker_username: str = None,
         docker_password: str = None,
         index: int = None) -> List[str]:
-    command = ''
+    # build the command token by token and join once at the end
+    # (repeated str concatenation copies the whole string each time)
+    parts = []
 
     # prepend environment variables in SINGULARITYENV_<key> format
     if env is not None:
-        if len(env) > 0: command += ' '.join([f"SINGULARITYENV_{v['key'].upper().replace(' ', '_')}=\"{v['value']}\"" for v in env])
-        command += ' '
+        parts.extend(f"SINGULARITYENV_{v['key'].translate(_KEY_TABLE)}=\"{v['value']}\"" for v in env)
 
     # substitute parameters
     if parameters is None: parameters = []
     if index is not None: parameters.append(Parameter(key='INDEX', value=str(index)))
     parameters.append(Parameter(key='WORKDIR', value=work_dir))
-    for parameter in parameters:
-        key = parameter['key'].upper().replace(' ', '_')
-        val = str(parameter['value'])
-        command += f" SINGULARITYENV_{key}=\"{val}\""
+    parts.extend(f"SINGULARITYENV_{p['key'].translate(_KEY_TABLE)}=\"{p['value']}\"" for p in parameters)
 
     # singularity invocation and working directory
-    command += f" singularity exec --home {work_dir}"
+    parts.append(f"singularity exec --home {work_dir}")
 
     # add bind mount arguments
     if bind_mounts is not None and len(bind_mounts) > 0:
-        command += (' --bind ' + ','.join([format_bind_mount(mount_point) for mount_point in bind_mounts]))
+        parts.append('--bind ' + ','.join(format_bind_mount(mount_point) for mount_point in bind_mounts))
 
     # whether to use the Singularity cache
-    if no_cache: command += ' --disable-cache'
+    if no_cache: parts.append('--disable-cache')
 
     # whether to use GPUs (Nvidia)
-    if gpus: command += ' --nv'
+    if gpus: parts.append('--nv')
 
     # append the command
     if shell is None: shell = 'sh'
-    command += f" {image} {shell} -c '{commands}'"
+    parts.append(f"{image} {shell} -c '{commands}'")
+
+    command = ' '.join(parts)
 
     # don't want to reveal secrets, so log the command before prepending secret env vars
     logger.debug(f"Using command: '{command}'")
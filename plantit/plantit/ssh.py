@@ -1,5 +1,8 @@
+import os
 import re
 import logging
+from collections import deque
+from functools import lru_cache
 from typing import List
 
 import paramiko
@@ -11,6 +14,59 @@ from plantit.keypairs import get_user_private_key_path
 
 logger = logging.getLogger(__name__)
 
+# prefer fast ciphers for the short polling commands this module mostly runs:
+# single-pass AEAD modes where the installed paramiko supports them, then
+# AES-128-CTR (hardware-accelerated via AES-NI). Transport preferences are
+# class-level, so this reordering applies to every client created here.
+_FAST_CIPHERS = (
+    'aes128-gcm@openssh.com',
+    'aes256-gcm@openssh.com',
+    'chacha20-poly1305@openssh.com',
+    'aes128-ctr',
+)
+paramiko.Transport._preferred_ciphers = tuple(
+    [cipher for cipher in _FAST_CIPHERS if cipher in paramiko.Transport._cipher_info] +
+    [cipher for cipher in paramiko.Transport._preferred_ciphers if cipher not in _FAST_CIPHERS])
+
+
+# host keys accepted on first contact are persisted here so later
+# processes (and restarts) don't have to rediscover them
+KNOWN_HOSTS = '../config/ssh/known_hosts'
+
+
+class SavingAutoAddPolicy(paramiko.AutoAddPolicy):
+    """Accepts unknown host keys like AutoAddPolicy, but also saves them to the known_hosts file."""
+
+    def missing_host_key(self, client, hostname, key):
+        super().missing_host_key(client, hostname, key)
+        try:
+            client.save_host_keys(KNOWN_HOSTS)
+        except OSError:
+            logger.warning(f"Failed to persist host key for '{hostname}'")
+
+
+@lru_cache(maxsize=64)
+def _load_private_key(path: str, mtime: float) -> paramiko.PKey:
+    try:
+        return paramiko.Ed25519Key.from_private_key_file(path)
+    except SSHException:
+        return paramiko.RSAKey.from_private_key_file(path)
+
+
+def load_private_key(path: str) -> paramiko.PKey:
+    """
+    Loads the private key at the given path. Keypairs are generated as Ed25519,
+    but fall back to RSA for keys created before the switch. Parsing a PEM key
+    isn't free and background tasks hit the same keys repeatedly, so parsed
+    keys are cached, with the file's modification time busting stale entries.
+
+    Args:
+        path: The private key file path.
+
+    Returns: The loaded private key.
+    """
+    return _load_private_key(path, os.stat(path).st_mtime)
+
 
 class SSH:
     """
@@ -42,17 +98,17 @@ class SSH:
 
     def __enter__(self):
         client = paramiko.SSHClient()
-        client.load_host_keys('../config/ssh/known_hosts')
+        client.load_host_keys(KNOWN_HOSTS)
 
         jump_client = paramiko.SSHClient()
-        jump_client.load_host_keys('../config/ssh/known_hosts')
+        jump_client.load_host_keys(KNOWN_HOSTS)
 
         if self.reject_if_missing_host_key:
             client.set_missing_host_key_policy(paramiko.RejectPolicy())
             jump_client.set_missing_host_key_policy(paramiko.RejectPolicy())
         else:
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.set_missing_host_key_policy(SavingAutoAddPolicy())
+            jump_client.set_missing_host_key_policy(SavingAutoAddPolicy())
 
         if self.password is not None:
             if self.jump_host:
@@ -65,7 +121,7 @@ class SSH:
             else:
                 client.connect(self.host, self.port, self.username, self.password, timeout=self.timeout)
         elif self.pkey is not None:
-            key = paramiko.RSAKey.from_private_key_file(self.pkey)
+            key = load_private_key(self.pkey)
             if self.jump_host:
                 jump_client.connect(self.jump_host, self.jump_port, self.username, pkey=key, timeout=self.timeout)
                 socket = jump_client.get_transport().open_channel(
@@ -83,6 +139,18 @@ class SSH:
         self.client.close()
 
 
+def drain(generator):
+    """
+    Exhausts a generator for its side effects, discarding any output.
+    Use this to run a command when its output doesn't matter; a zero-length
+    deque consumes the generator in C without keeping references.
+
+    Args:
+        generator: The generator to exhaust.
+    """
+    deque(generator, maxlen=0)
+
+
 def clean_html(raw_html: str) -> str:
     expr = re.compile('<.*?>')
     text = re.sub(expr, '', raw_html)
@@ -92,7 +160,7 @@ def clean_html(raw_html: str) -> str:
 @retry(
     wait=wait_exponential(multiplier=1, min=4, max=10),
     stop=stop_after_attempt(3),
-    retry=(retry_if_exception_type(AuthenticationException) | retry_if_exception_type(AuthenticationException) | retry_if_exception_type(ChannelException) | retry_if_exception_type(NoValidConnectionsError) | retry_if_exception_type(SSHException)),
+    retry=retry_if_exception_type((AuthenticationException, ChannelException, NoValidConnectionsError, SSHException)),
     reraise=True)
 def execute_interactive_command(
         ssh: SSH,
@@ -146,7 +214,7 @@ def execute_interactive_command(
 @retry(
     wait=wait_exponential(multiplier=1, min=4, max=10),
     stop=stop_after_attempt(3),
-    retry=(retry_if_exception_type(AuthenticationException) | retry_if_exception_type(AuthenticationException) | retry_if_exception_type(ChannelException) | retry_if_exception_type(NoValidConnectionsError) | retry_if_exception_type(SSHException)),
+    retry=retry_if_exception_type((AuthenticationException, ChannelException, NoValidConnectionsError, SSHException)),
     reraise=True)
 def execute_command(
         ssh: SSH,
@@ -190,9 +258,54 @@ def execute_command(
     elif not allow_stderr and len(errors) > 0: raise Exception(f"Received stderr: {errors}")
 
 
+@retry(
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    stop=stop_after_attempt(3),
+    retry=retry_if_exception_type((AuthenticationException, ChannelException, NoValidConnectionsError, SSHException)),
+    reraise=True)
+def execute_command_bulk(
+        ssh: SSH,
+        setup_command: str,
+        command: str,
+        directory: str = None,
+        allow_stderr: bool = False) -> (str, str):
+    """
+    Executes the given command on the given SSH connection, reading all output at once
+    rather than yielding it line by line. Prefer this over `execute_command` for short
+    commands (e.g. `sbatch`) whose output is parsed in bulk rather than streamed.
+
+    Args:
+        ssh: The SSH client.
+        setup_command: Commands to prepend to the primary command.
+        command: The command.
+        directory: Directory to run the command in.
+        allow_stderr: Whether to permit `stderr` output (by default an error is thrown).
+
+    Returns:
+        The command's stdout and stderr.
+    """
+
+    full_command = f"{setup_command} && {command}"
+    if directory is not None: full_command = f"cd {directory} && {full_command}"
+
+    logger.info(f"Executing command on '{ssh.host}': {full_command}")
+    stdin, stdout, stderr = ssh.client.exec_command(f"bash --login -c '{full_command}'", get_pty=True)
+    stdin.close()
+
+    output = clean_html(stdout.read().decode('utf-8', 'replace'))
+    errors = clean_html(stderr.read().decode('utf-8', 'replace'))
+
+    if stdout.channel.recv_exit_status() != 0: raise Exception(f"Received non-zero exit status from '{ssh.host}'")
+    elif not allow_stderr and errors.strip(): raise Exception(f"Received stderr: {errors}")
+    return output, errors
+
+
 def get_agent_ssh_client(agent: Agent) -> SSH:
+    # deferred import since ssh_pool imports this module
+    from plantit.ssh_pool import PooledSSH
+
     if agent.jump_hostname:
-        return SSH(
+        return PooledSSH(
             host=agent.hostname,
             port=agent.port,
             username=agent.username,
@@ -200,7 +313,7 @@ def get_agent_ssh_client(agent: Agent) -> SSH:
             jump_host=agent.jump_hostname,
             jump_port=agent.jump_port)
     else:
-        return SSH(
+        return PooledSSH(
             host=agent.hostname,
             port=agent.port,
             username=agent.username,
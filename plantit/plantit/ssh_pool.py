@@ -0,0 +1,144 @@
+import atexit
+import logging
+import threading
+import time
+
+from plantit.ssh import SSH
+
+logger = logging.getLogger(__name__)
+
+# how long (seconds) a connection may sit unused in the pool before it's closed
+SSH_POOL_IDLE_TIMEOUT = 60
+
+# how many idle connections to keep per (host, port, username)
+SSH_POOL_MAX_IDLE = 4
+
+# keepalive interval (seconds) for pooled connections, so idle ones
+# aren't silently dropped by NAT/firewall state between reuses
+SSH_KEEPALIVE_SECONDS = 15
+
+
+def close_quietly(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+class SSHPool:
+    """
+    A thread-safe pool of warm Paramiko clients keyed by (host, port, username).
+
+    SSH handshakes (key exchange + auth) dominate the latency of the short
+    squeue/sacct/pwd commands the orchestrator runs against agents, so rather
+    than closing a connection when its context exits, keep it warm for a while
+    and hand it to the next caller bound for the same host.
+    """
+
+    def __init__(self, max_idle: int = SSH_POOL_MAX_IDLE, idle_timeout: int = SSH_POOL_IDLE_TIMEOUT):
+        self._lock = threading.Lock()
+        self._idle = dict()  # key -> list of (client, released_at)
+        self._max_idle = max_idle
+        self._idle_timeout = idle_timeout
+
+    @staticmethod
+    def _key(ssh: SSH):
+        return ssh.host, ssh.port, ssh.username
+
+    def acquire(self, ssh: SSH):
+        """
+        Pops a warm client for the given connection parameters, or returns None
+        if the caller needs to perform a fresh handshake. Dead or stale entries
+        are discarded along the way.
+
+        Args:
+            ssh: The SSH wrapper requesting a client.
+
+        Returns: A connected Paramiko client, or None.
+        """
+        with self._lock:
+            entries = self._idle.get(self._key(ssh), [])
+            while entries:
+                client, released = entries.pop()
+                if time.time() - released > self._idle_timeout:
+                    close_quietly(client)
+                    continue
+                transport = client.get_transport()
+                if transport is None or not transport.is_active():
+                    close_quietly(client)
+                    continue
+                try:
+                    # lightweight health check before handing the connection out
+                    transport.send_ignore()
+                except Exception:
+                    close_quietly(client)
+                    continue
+                logger.debug(f"Reusing pooled SSH connection to '{ssh.host}'")
+                return client
+        return None
+
+    def release(self, ssh: SSH) -> bool:
+        """
+        Returns the wrapper's client to the pool for reuse.
+
+        Args:
+            ssh: The SSH wrapper releasing its client.
+
+        Returns: True if the client was pooled, False if the caller should close it.
+        """
+        client = ssh.client
+        if client is None: return False
+        transport = client.get_transport()
+        if transport is None or not transport.is_active(): return False
+        transport.set_keepalive(SSH_KEEPALIVE_SECONDS)
+        with self._lock:
+            self._sweep()
+            entries = self._idle.setdefault(self._key(ssh), [])
+            if len(entries) >= self._max_idle: return False
+            entries.append((client, time.time()))
+        return True
+
+    def _sweep(self):
+        # close connections which have idled out (call with the lock held)
+        now = time.time()
+        for key, entries in self._idle.items():
+            fresh = []
+            for client, released in entries:
+                if now - released > self._idle_timeout:
+                    close_quietly(client)
+                else:
+                    fresh.append((client, released))
+            self._idle[key] = fresh
+
+    def close_all(self):
+        with self._lock:
+            for entries in self._idle.values():
+                for client, _ in entries:
+                    close_quietly(client)
+            self._idle.clear()
+
+
+class PooledSSH(SSH):
+    """
+    Drop-in replacement for SSH which draws from (and returns to) the shared
+    connection pool instead of handshaking and closing on every context entry.
+    """
+
+    def __enter__(self):
+        client = SSH_POOL.acquire(self)
+        if client is None:
+            super().__enter__()
+        else:
+            self.client = client
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # pool the connection on a clean exit; close it if something went wrong
+        # (the session state may be unknown) or the pool is already full
+        if exc_type is None and SSH_POOL.release(self):
+            self.client = None
+        else:
+            super().__exit__(exc_type, exc_value, traceback)
+
+
+SSH_POOL = SSHPool()
+atexit.register(SSH_POOL.close_all)
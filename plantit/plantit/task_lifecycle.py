@@ -1,8 +1,12 @@
+import io
 import json
 import logging
+import mmap
 import os
+import re
 import traceback
 import uuid
+from collections import Counter
 from datetime import timedelta, datetime
 from os import environ
 from os.path import join, isdir
@@ -13,6 +17,8 @@ import binascii
 from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
 from django.utils import timezone
 from django_celery_beat.models import IntervalSchedule, PeriodicTasks
 from paramiko.ssh_exception import AuthenticationException, ChannelException, NoValidConnectionsError, SSHException
@@ -24,7 +30,7 @@ from plantit.agents.models import Agent
 from plantit.miappe.models import Investigation, Study
 from plantit.redis import RedisClient
 from plantit.sns import SnsClient
-from plantit.ssh import SSH, execute_command, get_agent_ssh_client
+from plantit.ssh import SSH, drain, execute_command, execute_command_bulk, get_agent_ssh_client
 from plantit.task_resources import log_task_status, push_task_channel_event
 from plantit.task_scripts import compose_job_script, compose_launcher_script, compose_push_script, compose_pull_script, compose_report_script
 from plantit.tasks.models import DelayedTask, RepeatingTask, TriggeredTask, Task, TaskStatus, TaskCounter, TaskOptions, BindMount, InputKind, \
@@ -35,6 +41,71 @@ from plantit.utils.tasks import parse_task_eta, parse_task_time_limit, parse_job
 
 logger = logging.getLogger(__name__)
 
+# how long to cache Docker Hub image existence checks
+IMAGE_EXISTS_CACHE_SECONDS = 300
+
+# how long to cache agent records (agents change rarely relative to task creation)
+AGENT_CACHE_SECONDS = 60
+
+# sentinel distinguishing "key absent" from falsy values in config dicts
+_MISSING = object()
+
+
+class ConfigError(ValueError):
+    """Raised internally to short-circuit task configuration validation on the first problem."""
+    pass
+
+# simple jobqueue fields and their expected types; defaults come from the agent
+_JOBQUEUE_FIELDS = (('queue', str), ('project', str), ('cores', int), ('processes', int))
+
+# long-form scheduler states worth looking for in the job log when sacct comes
+# up empty (the two-letter codes would match far too much arbitrary log text)
+_JOB_STATE_GREP = '|'.join(state for state in (
+        Task.SLURM_FAILURE_STATES + Task.SLURM_CANCELLED_STATES + Task.SLURM_TIMEOUT_STATES +
+        Task.SLURM_SUCCESS_STATES + Task.SLURM_RUNNING_STATES) if len(state) > 2)
+
+# progress markers in scheduler logs, keyed by the agent's launcher flag;
+# one alternation per agent type so each log is scanned once for all markers
+_PROGRESS_MARKER_PATTERNS = {
+    True: re.compile(rb'Downloading file|Uploading file|running job|done\. Exiting'),
+    False: re.compile(rb'Downloading file|Uploading file|Submitting container|Container completed'),
+}
+
+
+def image_exists_cached(name, owner=None, tag=None) -> bool:
+    """
+    Checks whether the image exists on Docker Hub, caching results briefly
+    (tag existence rarely changes, and resubmissions shouldn't pay for an
+    HTTP round trip every time).
+
+    Args:
+        name: The image name
+        owner: The image owner
+        tag: The image tag
+
+    Returns: True if the image exists, otherwise False
+    """
+
+    redis = RedisClient.get()
+    key = f"image_exists/{owner}/{name}/{tag}"
+    cached = redis.get(key)
+    if cached is not None: return cached == b'1'
+    exists = docker.image_exists(name, owner, tag)
+    redis.setex(key, IMAGE_EXISTS_CACHE_SECONDS, '1' if exists else '0')
+    return exists
+
+
+def get_agent_cached(name: str) -> Agent:
+    """
+    Gets the agent with the given name, caching it briefly to spare a DB round trip per task creation.
+
+    Args:
+        name: The agent name
+
+    Returns: The agent
+    """
+    return cache.get_or_set(f"agents/{name}", lambda: Agent.objects.get(name=name), AGENT_CACHE_SECONDS)
+
 
 def create_immediate_task(user: User, config: dict):
     # set submission time so we can persist configuration
@@ -58,7 +129,7 @@ def create_immediate_task(user: User, config: dict):
     if guid is None: guid = str(uuid.uuid4())
 
     # get the agent this task should be submitted on
-    agent = Agent.objects.get(name=config['agent'])
+    agent = get_agent_cached(config['agent'])
 
     # if we have a time limit, calculate due time
     time = config.get('time', None)
@@ -105,9 +176,9 @@ def create_immediate_task(user: User, config: dict):
     task.save()
 
     # increment task count for aggregate statistics
-    counter = TaskCounter.load()
-    counter.count = counter.count + 1
-    counter.save()
+    # (atomic F() update instead of read-modify-write, which both races and saves every column)
+    TaskCounter.objects.get_or_create(pk=1)
+    TaskCounter.objects.filter(pk=1).update(count=F('count') + 1)
 
     return task
 
@@ -223,9 +294,16 @@ def create_triggered_task(user: User, config: dict):
     return task, created
 
 
+def upload_script(sftp, path: str, lines: List[str]):
+    # join and encode the whole script once (not per line), then send it with a single putfo —
+    # it never touches local disk
+    payload = ('\n'.join(map(str, lines)) + '\n').encode('utf-8')
+    sftp.putfo(io.BytesIO(payload), path)
+
+
 def upload_deployment_artifacts(task: Task, ssh: SSH, options: TaskOptions):
     # working directory
-    work_dir = join(task.agent.workdir, task.workdir)
+    work_dir = task.full_workdir
 
     # if this workflow has input files, get a list of them
     if 'input' in options:
@@ -233,7 +311,7 @@ def upload_deployment_artifacts(task: Task, ssh: SSH, options: TaskOptions):
         logger.info(f"Creating input directory for task {task.guid}")
         # setup command
         setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
-        for line in list(execute_command(ssh=ssh, setup_command=setup_command, command=f"mkdir {join(work_dir, 'input')}")): logger.debug(line)
+        for line in execute_command(ssh=ssh, setup_command=setup_command, command=f"mkdir {join(work_dir, 'input')}"): logger.debug(line)
 
         # get their filenames
         if 'input' not in options or options['input'] is None: inputs = []
@@ -246,7 +324,7 @@ def upload_deployment_artifacts(task: Task, ssh: SSH, options: TaskOptions):
 
     # save the expected number of input files to the task
     task.inputs_detected = len(inputs)
-    task.save()
+    task.save(update_fields=['inputs_detected'])
 
     # misc notes:
     # - if sftp throws an IOError or complains about filesizes,
@@ -257,83 +335,77 @@ def upload_deployment_artifacts(task: Task, ssh: SSH, options: TaskOptions):
         # if we have inputs, compose and transfer the pull script
         if len(inputs) > 0:
             pull_script_path = join(work_dir, f"{task.guid}_pull.sh")
-            with sftp.file(join(work_dir, pull_script_path), 'w') as pull_script:
-                lines = compose_pull_script(task, options)
-                for line in lines: pull_script.write(f"{line}\n".encode('utf-8'))
-                pull_script.seek(0)
-                logger.info(f"Uploaded pull script {pull_script_path} for task {task.guid}")
+            upload_script(sftp, pull_script_path, compose_pull_script(task, options))
+            logger.info(f"Uploaded pull script {pull_script_path} for task {task.guid}")
 
             # if this agent doesn't use the TACC launcher, we also need a file listing inputs for the job array to consume
             if not task.agent.launcher:
                 inputs_file_path = join(work_dir, settings.INPUTS_FILE_NAME)
-                with sftp.file(inputs_file_path, 'w') as inputs_file:
-                    for line in inputs: inputs_file.write(f"{line}\n".encode('utf-8'))
-                    inputs_file.seek(0)
-                    logger.info(f"Uploaded inputs file {inputs_file_path} for task {task.guid}")
+                upload_script(sftp, inputs_file_path, inputs)
+                logger.info(f"Uploaded inputs file {inputs_file_path} for task {task.guid}")
 
         # compose and transfer the job script
         job_script_path = join(work_dir, f"{task.guid}.sh")
-        with sftp.file(job_script_path, 'w') as job_script:
-            lines = compose_job_script(task, options, inputs)
-            for line in lines: job_script.write(f"{line}\n".encode('utf-8'))
-            job_script.seek(0)
-            logger.info(f"Uploaded job script {job_script_path} for task {task.guid}")
+        upload_script(sftp, job_script_path, compose_job_script(task, options, inputs))
+        logger.info(f"Uploaded job script {job_script_path} for task {task.guid}")
 
         # if the selected agent uses the TACC Launcher, create and upload a launcher script too
         if task.agent.launcher:
             launcher_script_path = join(work_dir, settings.LAUNCHER_SCRIPT_NAME)
-            with sftp.file(launcher_script_path, 'w') as launcher_script:
-                launcher_commands = compose_launcher_script(task, options, inputs)
-                for line in launcher_commands: launcher_script.write(f"{line}\n".encode('utf-8'))
-                launcher_script.seek(0)
-                logger.info(f"Uploaded launcher script {launcher_script_path} for task {task.guid}")
+            upload_script(sftp, launcher_script_path, compose_launcher_script(task, options, inputs))
+            logger.info(f"Uploaded launcher script {launcher_script_path} for task {task.guid}")
 
         # compose and transfer the push script
         push_script_path = join(work_dir, f"{task.guid}_push.sh")
-        with sftp.file(push_script_path, 'w') as push_script:
-            lines = compose_push_script(task, options)
-            for line in lines:
-                push_script.write(f"{line}\n".encode('utf-8'))
-            push_script.seek(0)
-            logger.info(f"Uploaded push script {push_script_path} for task {task.guid}")
+        upload_script(sftp, push_script_path, compose_push_script(task, options))
+        logger.info(f"Uploaded push script {push_script_path} for task {task.guid}")
 
         # compose and transfer the completion reporting script
         report_script_path = join(work_dir, f"{task.guid}_report.sh")
-        with sftp.file(report_script_path, 'w') as report_script:
-            lines = compose_report_script(task)
-            for line in lines:
-                report_script.write(f"{line}\n".encode('utf-8'))
-            report_script.seek(0)
-            logger.info(f"Uploaded report script {report_script_path} for task {task.guid}")
+        upload_script(sftp, report_script_path, compose_report_script(task))
+        logger.info(f"Uploaded report script {report_script_path} for task {task.guid}")
 
 
-def submit_pull_to_scheduler(task: Task, ssh: SSH) -> str:
-    # setup command
-    setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
+def submit_to_scheduler(task: Task, ssh: SSH, command: str) -> str:
+    """
+    Runs the given submission command on the task's agent and parses the job ID from the output.
 
-    # command
-    script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}_pull.sh"
-    command = f"sbatch {script_path}"
+    Args:
+        task: The task
+        ssh: The SSH client
+        command: The submission command
 
-    # workdir
-    workdir = join(task.agent.workdir, task.workdir)
+    Returns: The scheduler's job ID
+    """
 
-    # submit to agent's scheduler
-    lines = []
-    for line in execute_command(ssh=ssh, setup_command=setup_command, command=command, allow_stderr=True):
-        stripped = line.strip()
-        if stripped:
-            logger.info(f"[{task.agent.name}] {stripped}")
-            lines.append(stripped)
+    setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
+
+    # sbatch output is just a line or two, so read it in bulk rather than line by line
+    output, _ = execute_command_bulk(ssh=ssh, setup_command=setup_command, command=command, allow_stderr=True)
+    lines = [stripped for stripped in (line.strip() for line in output.splitlines()) if stripped]
+    for line in lines: logger.info(f"[{task.agent.name}] {line}")
 
     return parse_job_id(lines[-1])
 
 
+def submit_pull_to_scheduler(task: Task, ssh: SSH) -> str:
+    script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}_pull.sh"
+    return submit_to_scheduler(task, ssh, f"sbatch {script_path}")
+
+
 def submit_job_to_scheduler(task: Task, ssh: SSH, pull_id: str) -> str:
     # parse the task configuration
     parse_errors, options = parse_task_options(task)
     if len(parse_errors) > 0: raise ValueError(f"Failed to parse task options: {' '.join(parse_errors)}")
 
+    depend_clause = ' ' if pull_id is None else (' --depend=afterany:' + pull_id + ' ')
+    script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}.sh"
+
+    # the launcher path submits no job array, so it doesn't need the input
+    # listing below (a CyVerse API round trip per submission)
+    if task.agent.launcher:
+        return submit_to_scheduler(task, ssh, f"sbatch{depend_clause}{script_path}")
+
     # inputs
     if 'input' not in options or options['input'] is None:
         inputs = []
@@ -345,79 +417,28 @@ def submit_job_to_scheduler(task: Task, ssh: SSH, pull_id: str) -> str:
         client = CyverseClient(token)
         inputs = [client.stat(path)['path'].rpartition('/')[2]] if kind == InputKind.FILE else [f['label'] for f in client.list_files(path)]
 
-    # setup command
-    setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
-
     # submission command
     n_inputs = len(inputs)
     n_iterations = int(options['iterations'])
-    depend_clause = ' ' if pull_id is None else (' --depend=afterany:' + pull_id + ' ')
-    script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}.sh"
     if 'input' in options:
         array_clause = ' ' if (n_inputs == 0 or kind == InputKind.DIRECTORY) else (' --array=1-' + str(n_inputs) + ' ')
     elif n_iterations > 1:
         array_clause = f" --array=1-{n_iterations}"
     else: array_clause = ' '
-    if task.agent.launcher: command = f"sbatch{depend_clause}{script_path}"
-    else:
-        command = f"sbatch{depend_clause}{array_clause}{script_path}"
-
-    # workdir
-    workdir = join(task.agent.workdir, task.workdir)
 
-    # submit the job to the agent's scheduler
-    lines = []
-    for line in execute_command(ssh=ssh, setup_command=setup_command, command=command, allow_stderr=True):
-        stripped = line.strip()
-        if stripped:
-            logger.info(f"[{task.agent.name}] {stripped}")
-            lines.append(stripped)
-
-    return parse_job_id(lines[-1])
+    return submit_to_scheduler(task, ssh, f"sbatch{depend_clause}{array_clause}{script_path}")
 
 
 def submit_push_to_scheduler(task: Task, ssh: SSH, job_id: str = None) -> str:
-    # setup command
-    setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
-
-    # command
     script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}_push.sh"
     command = f"sbatch{' ' if job_id is None else (' --depend=afterany:' + job_id + ' ')}{script_path}"
-
-    # workdir
-    workdir = join(task.agent.workdir, task.workdir)
-
-    # submit to agent's scheduler
-    lines = []
-    for line in execute_command(ssh=ssh, setup_command=setup_command, command=command, allow_stderr=True):
-        stripped = line.strip()
-        if stripped:
-            logger.info(f"[{task.agent.name}] {stripped}")
-            lines.append(stripped)
-
-    return parse_job_id(lines[-1])
+    return submit_to_scheduler(task, ssh, command)
 
 
 def submit_report_to_scheduler(task: Task, ssh: SSH, push_id: str = None) -> str:
-    # setup command
-    setup_command = '; '.join(str(task.agent.pre_commands).splitlines()) if task.agent.pre_commands else ':'
-
-    # command
     script_path = Path(task.agent.workdir) / task.workdir / f"{task.guid}_report.sh"
     command = f"sbatch{' ' if push_id is None else (' --depend=afterany:' + push_id + ' ')}{script_path}"
-
-    # workdir
-    workdir = join(task.agent.workdir, task.workdir)
-
-    # submit to agent's scheduler
-    lines = []
-    for line in execute_command(ssh=ssh, setup_command=setup_command, command=command, allow_stderr=True):
-        stripped = line.strip()
-        if stripped:
-            logger.info(f"[{task.agent.name}] {stripped}")
-            lines.append(stripped)
-
-    return parse_job_id(lines[-1])
+    return submit_to_scheduler(task, ssh, command)
 
 
 def cancel_task(task: Task):
@@ -427,7 +448,7 @@ def cancel_task(task: Task):
         task.status = TaskStatus.CANCELED
         task.updated = now
         task.completed = now
-        task.save()
+        task.save(update_fields=['status', 'updated', 'completed'])
 
         # cancel any jobs associated with the task
         ssh = get_agent_ssh_client(task.agent)
@@ -442,11 +463,12 @@ def cancel_task(task: Task):
                 lines.append(line)
 
             if task.job_id is not None and any((task.job_id in r) for r in lines):
-                execute_command(
+                # execute_command is a generator, so it must be exhausted for the command to run
+                drain(execute_command(
                     ssh=ssh,
                     setup_command=':',
                     command=f"scancel {task.job_id}",
-                    allow_stderr=True)
+                    allow_stderr=True))
     except:
         logger.warning(f"Error canceling job on {task.agent.name}: {traceback.format_exc()}")
 
@@ -464,27 +486,32 @@ def check_job_logs_for_progress(task: Task):
         logger.warning(f"Scheduler log file {get_job_log_file_name(task)} does not exist yet")
         return
 
-    with open(scheduler_log_file_path, 'r') as scheduler_log_file:
-        lines = scheduler_log_file.readlines()
-        all_lines = '\n'.join(lines)
-
-        task.inputs_downloaded = all_lines.count('Downloading file')
-        task.results_transferred = all_lines.count('Uploading file')
+    # markers differ depending on whether the agent uses the TACC launcher
+    submitted_marker = b'running job' if task.agent.launcher else b'Submitting container'
+    completed_marker = b'done. Exiting' if task.agent.launcher else b'Container completed'
+    pattern = _PROGRESS_MARKER_PATTERNS[task.agent.launcher]
 
-        if task.agent.launcher:
-            task.inputs_submitted = all_lines.count('running job')
-            task.inputs_completed = all_lines.count('done. Exiting')
-        else:
-            task.inputs_submitted = all_lines.count('Submitting container')
-            task.inputs_completed = all_lines.count('Container completed')
+    # memory-map the log and count all four markers in a single scan,
+    # rather than materializing the file and scanning it once per marker
+    counts = Counter()
+    with open(scheduler_log_file_path, 'rb') as scheduler_log_file:
+        try:
+            data = mmap.mmap(scheduler_log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            data = b''  # empty files can't be mapped
+        counts.update(match.group() for match in pattern.finditer(data))
 
-        task.save()
+    task.inputs_downloaded = counts[b'Downloading file']
+    task.results_transferred = counts[b'Uploading file']
+    task.inputs_submitted = counts[submitted_marker]
+    task.inputs_completed = counts[completed_marker]
+    task.save(update_fields=['inputs_downloaded', 'results_transferred', 'inputs_submitted', 'inputs_completed'])
 
 
 @retry(
     wait=wait_random_exponential(multiplier=5, max=120),
     stop=stop_after_attempt(3),
-    retry=(retry_if_exception_type(AuthenticationException) | retry_if_exception_type(AuthenticationException) | retry_if_exception_type(ChannelException) | retry_if_exception_type(NoValidConnectionsError) | retry_if_exception_type(SSHException)),
+    retry=retry_if_exception_type((AuthenticationException, ChannelException, NoValidConnectionsError, SSHException)),
     reraise=True)
 def get_job_status_and_walltime(task: Task):
     ssh = get_agent_ssh_client(task.agent)
@@ -523,31 +550,20 @@ def get_job_status_and_walltime(task: Task):
             pass
 
         # check the scheduler log file in case `sacct` is no longer displaying info
-        # about this job so we don't miss a cancellation/timeout/failure/completion
-        with ssh.client.open_sftp() as sftp:
-
-            log_file_path = join(task.workdir, f"{task.guid}_staging", get_job_log_file_name(task))
-            stdin, stdout, stderr = ssh.client.exec_command(f"test -e {log_file_path} && echo exists")
-
-            # if log file doesn't exist, return None
-            if stdout.read().decode().strip() != 'exists': status = None
-
-            # otherwise check the log file to see if job status was written there
-            else:
-                with sftp.open(log_file_path, 'r') as log_file:
-                    logger.info(f"Checking scheduler log file {log_file_path} for job {task.job_id} status")
-                    for line in log_file.readlines():
-                        # if we find success or failure, stop
-                        for s in (Task.SLURM_FAILURE_STATES + Task.SLURM_TIMEOUT_STATES + Task.SLURM_SUCCESS_STATES):
-                            if s in line:
-                                status = s
-                                break
-
-                        # otherwise use the most recent status (last line of the log file)
-                        for s in (Task.SLURM_CANCELLED_STATES + Task.SLURM_TIMEOUT_STATES + Task.SLURM_SUCCESS_STATES + Task.SLURM_RUNNING_STATES):
-                            if s in line:
-                                status = s
-                                continue
+        # about this job so we don't miss a cancellation/timeout/failure/completion;
+        # tail and grep the log remotely on the session we already have, rather
+        # than opening an SFTP channel and scanning the whole file in Python
+        log_file_path = join(task.workdir, f"{task.guid}_staging", get_job_log_file_name(task))
+        logger.info(f"Checking scheduler log file {log_file_path} for job {task.job_id} status")
+        # double-quote the pattern: execute_command wraps commands in single
+        # quotes, so single quotes here would end the wrapper early and turn
+        # the pattern's alternations into shell pipes
+        command = f'tail -c 65536 {log_file_path} 2>/dev/null | grep -Eo "{_JOB_STATE_GREP}" | tail -n 1'
+        found = None
+        for line in execute_command(ssh=ssh, setup_command=':', command=command, allow_stderr=True):
+            stripped = line.strip()
+            if stripped: found = stripped
+        if found is not None: status = found
 
     return status, walltime
 
@@ -563,7 +579,7 @@ def list_result_files(task: Task) -> List[dict]:
 
     """
 
-    seen = []
+    seen = set()
     results = []
     ssh = get_agent_ssh_client(task.agent)
     zip_dir = join(task.agent.workdir, task.workdir, f"{task.guid}_staging")
@@ -572,17 +588,14 @@ def list_result_files(task: Task) -> List[dict]:
 
     with ssh:
         with ssh.client.open_sftp() as sftp:
-            # list contents of task working directory
-            names = sftp.listdir(zip_dir)
+            # list contents of task working directory (a set makes each existence check a hash lookup)
+            names = set(sftp.listdir(zip_dir))
 
             # check for files by name
             logger.info(f"Looking for files by name: {', '.join(expected_names)}")
             for name in expected_names:
-                if name in names:
-                    exists = True
-                    seen.append(name)
-                else:
-                    exists = False
+                exists = name in names
+                if exists: seen.add(name)
 
                 output = {
                     'name': name,
@@ -591,37 +604,30 @@ def list_result_files(task: Task) -> List[dict]:
                 }
                 results.append(output)
 
-                # file_path = join(workdir, expected_name)
-                # stdin, stdout, stderr = ssh.client.exec_command(f"test -e {file_path} && echo exists")
-                # output = {
-                #     'name': expected_name,
-                #     'path': join(workdir, expected_name),
-                #     'exists': stdout.read().decode().strip() == 'exists'
-                # }
-                # seen.append(output['name'])
-                # outputs.append(output)
-
-            # check for files by pattern, excluding any we've already matched by name
+            # check for files by pattern, excluding any we've already matched by name;
+            # a single precompiled alternation lets us scan the directory listing once
+            # instead of once per pattern
             logger.info(f"Looking for files by pattern: {', '.join(expected_patterns)}")
+            matched_patterns = set()
+            if expected_patterns:
+                expr = re.compile('|'.join(re.escape(pattern) for pattern in expected_patterns))
+                for name in sorted(names):
+                    if expr.search(name) is None: continue
+
+                    # if this filename matches a pattern and hasn't already been included by name, add it to the list;
+                    # if the pattern matched something already included by name, don't count it as missing
+                    matched_patterns.update(pattern for pattern in expected_patterns if pattern in name)
+                    if name not in seen:
+                        seen.add(name)
+                        results.append({
+                            'name': name,
+                            'path': join(zip_dir, name),
+                            'exists': True
+                        })
+
+            # report any patterns which didn't match anything as missing
             for pattern in expected_patterns:
-
-                # check if the pattern matches any of the directory contents
-                any_matched = False
-                for name in names:
-                    # if this filename matches a pattern and hasn't already been included by name, add it to the list
-                    if pattern in name:
-                        if not any(s == name for s in seen):
-                            results.append({
-                                'name': name,
-                                'path': join(zip_dir, name),
-                                'exists': True
-                            })
-
-                        # if the pattern matched something already included by name, don't count it as missing
-                        any_matched = True
-
-                # otherwise report the pattern missing
-                if not any_matched:
+                if pattern not in matched_patterns:
                     results.append({
                         'name': f"*.{pattern}",
                         'path': join(zip_dir, f"*.{pattern}"),
@@ -632,40 +638,39 @@ def list_result_files(task: Task) -> List[dict]:
     return results
 
 
-def parse_task_options(task: Task) -> (List[str], TaskOptions):
+def parse_task_options(task: Task, use_cache: bool = True) -> (List[str], TaskOptions):
+    # parsing is pure in the task's workflow config, which doesn't change once submitted,
+    # so cache the result on the Task instance and reuse it for subsequent calls
+    if use_cache:
+        cached = getattr(task, '_parsed_options', None)
+        if cached is not None: return cached
+
     config = task.workflow
     config['workdir'] = join(task.agent.workdir, task.guid)
-    config['log_file'] = f"{task.guid}.{task.agent.name.lower()}.log"
+    config['log_file'] = f"{task.guid}.{task.agent.name_lower}.log"
 
     # set the output directory (if none is set, use the task working dir)
-    default_from = join(task.agent.workdir, task.workdir)
-    if 'output' in config:
-        if 'from' in config['output']:
-            if config['output']['from'] is not None and config['output']['from'] != '':
-                config['output']['from'] = join(task.agent.workdir, task.workdir, config['output']['from'])
-            else:
-                config['output']['from'] = default_from
-        else:
-            config['output']['from'] = default_from
+    default_from = task.full_workdir
+    output = config.setdefault('output', dict())
+    if output.get('from'):
+        output['from'] = join(task.agent.workdir, task.workdir, output['from'])
     else:
-        config['output'] = dict()
-        config['output']['from'] = default_from
+        output['from'] = default_from
 
-    if 'include' not in config['output']: config['output']['include'] = dict()
-    if 'patterns' not in config['output']['include']: config['output']['exclude']['patterns'] = []
+    include = output.setdefault('include', dict())
+    include.setdefault('patterns', [])
 
     # include scheduler logs
-    # config['output']['include']['patterns'].append("out")
-    # config['output']['include']['patterns'].append("err")
-    # config['output']['include']['patterns'].append("log")
+    # include['patterns'].append("out")
+    # include['patterns'].append("err")
+    # include['patterns'].append("log")
 
-    if 'exclude' not in config['output']: config['output']['exclude'] = dict()
-    if 'names' not in config['output']['exclude']: config['output']['exclude']['names'] = []
+    exclude = output.setdefault('exclude', dict())
+    exclude.setdefault('names', [])
 
     # exclude template scripts
-    config['output']['exclude']['names'].append("template_task_local.sh")
-    config['output']['exclude']['names'].append("template_task_slurm.sh")
-    output = config['output']
+    exclude['names'].append("template_task_local.sh")
+    exclude['names'].append("template_task_slurm.sh")
 
     # from here on, make sure we have no configuration errors
     errors = []
@@ -679,7 +684,7 @@ def parse_task_options(task: Task) -> (List[str], TaskOptions):
         image = config['image']
         if 'docker' in image:
             image_owner, image_name, image_tag = docker.parse_image_components(image)
-            if not docker.image_exists(image_name, image_owner, image_tag):
+            if not image_exists_cached(image_name, image_owner, image_tag):
                 errors.append(f"Image '{image}' not found on Docker Hub")
 
     work_dir = None
@@ -710,25 +715,23 @@ def parse_task_options(task: Task) -> (List[str], TaskOptions):
 
     parameters = None
     if 'parameters' in config:
-        if not all(['name' in param and
-                    param['name'] is not None and
-                    param['name'] != '' and
-                    'value' in param and
-                    param['value'] is not None and
-                    param['value'] != ''
-                    for param in config['parameters']]):
+        params = config['parameters']
+        if not all(param.get('name') not in (None, '') and
+                   param.get('value') not in (None, '')
+                   for param in params):
             errors.append('Every parameter must have a non-empty \'name\' and \'value\'')
         else:
-            parameters = [Parameter(key=param['name'], value=param['value']) for param in config['parameters']]
+            parameters = [Parameter(key=param['name'], value=param['value']) for param in params]
 
     mount = None
     if 'mount' in config:
-        if not all(mount_point != '' for mount_point in config['mount']):
+        mount_points = config['mount']
+        if not all(mount_point != '' for mount_point in mount_points):
             errors.append('Every bind mount must be non-empty')
-        elif any(":" in mount_point for mount_point in config['mount']):
+        elif any(":" in mount_point for mount_point in mount_points):
             errors.append('Bind mounts must specify only the container path (host path is assigned automatically)')
         else:
-            mount = [BindMount(host_path=os.path.join(work_dir, mount_point.lstrip(os.path.sep)), container_path=mount_point) for mount_point in config['mount']]
+            mount = [BindMount(host_path=os.path.join(work_dir, mount_point.lstrip(os.path.sep)), container_path=mount_point) for mount_point in mount_points]
 
     iterations = None
     if 'iterations' in config:
@@ -738,21 +741,21 @@ def parse_task_options(task: Task) -> (List[str], TaskOptions):
 
     input = None
     if 'input' in config:
-        if 'kind' not in config['input']:
+        input_config = config['input']
+        if 'kind' not in input_config:
             errors.append("Section \'input\' must include attribute \'kind\'")
-        if 'path' not in config['input']:
+        if 'path' not in input_config:
             errors.append("Section \'input\' must include attribute \'path\'")
 
-        kind = config['input']['kind']
-        path = config['input']['path']
+        kind = input_config['kind']
+        path = input_config['path']
         if kind == 'file':
             input = Input(path=path, kind='file')
-        elif kind == 'files':
-            input = Input(path=path, kind='files',
-                          patterns=config['input']['patterns'] if 'patterns' in config['input'] else None)
-        elif kind == 'directory':
-            input = Input(path=path, kind='directory',
-                          patterns=config['input']['patterns'] if 'patterns' in config['input'] else None)
+        elif kind == 'files' or kind == 'directory':
+            # only set patterns when configured, so the options never carry None values
+            input = Input(path=path, kind=kind)
+            patterns = input_config.get('patterns')
+            if patterns is not None: input['patterns'] = patterns
         else:
             errors.append('Section \'input.kind\' must be \'file\', \'files\', or \'directory\'')
 
@@ -783,40 +786,42 @@ def parse_task_options(task: Task) -> (List[str], TaskOptions):
         #         'slurm' in jobqueue or 'yarn' in jobqueue or 'pbs' in jobqueue or 'moab' in jobqueue or 'sge' in jobqueue or 'lsf' in jobqueue or 'oar' in jobqueue or 'kube' in jobqueue):
         #     raise ValueError(f"Unsupported jobqueue configuration: {jobqueue}")
 
-        if 'queue' in jobqueue:
-            if not isinstance(jobqueue['queue'], str):
-                errors.append('Section \'jobqueue\'.\'queue\' must be a str')
-        else:
-            jobqueue['queue'] = task.agent.queue
-        if 'project' in jobqueue:
-            if not isinstance(jobqueue['project'], str):
-                errors.append('Section \'jobqueue\'.\'project\' must be a str')
-        elif task.agent.project is not None and task.agent.project != '':
-            jobqueue['project'] = task.agent.project
-        if 'walltime' in jobqueue:
-            if not isinstance(jobqueue['walltime'], str):
-                errors.append('Section \'jobqueue\'.\'walltime\' must be a str')
-        elif 'time' in jobqueue:
-            if not isinstance(jobqueue['time'], str):
-                errors.append('Section \'jobqueue\'.\'time\' must be a str (note that \'time\' is also deprecated, please use \'walltime\' instead')
-        else:
-            jobqueue['walltime'] = task.agent.max_walltime
-        if 'cores' in jobqueue:
-            if not isinstance(jobqueue['cores'], int):
-                errors.append('Section \'jobqueue\'.\'cores\' must be a int')
-        else:
-            jobqueue['cores'] = task.agent.max_cores
-        if 'processes' in jobqueue:
-            if not isinstance(jobqueue['processes'], int):
-                errors.append('Section \'jobqueue\'.\'processes\' must be a int')
-        else:
-            jobqueue['processes'] = task.agent.max_processes
-        # if 'header_skip' in jobqueue and not all(extra is str for extra in jobqueue['header_skip']):
-        #     errors.append('Section \'jobqueue\'.\'header_skip\' must be a list of str')
-        # elif task.agent.header_skip is not None and task.agent.header_skip != '':
-        #     jobqueue['header_skip'] = [task.agent.header_skip]
-        if 'extra' in jobqueue and not all(extra is str for extra in jobqueue['extra']):
-            errors.append('Section \'jobqueue\'.\'extra\' must be a list of str')
+        # validate the simple fields data-driven: one .get() per key instead of separate membership and subscript probes;
+        # callers only check whether any error occurred before raising, so stop at the first problem rather than
+        # finishing the walk
+        try:
+            defaults = {
+                'queue': task.agent.queue,
+                'project': task.agent.project if task.agent.project is not None and task.agent.project != '' else _MISSING,
+                'cores': task.agent.max_cores,
+                'processes': task.agent.max_processes,
+            }
+            for key, expected in _JOBQUEUE_FIELDS:
+                value = jobqueue.get(key, _MISSING)
+                if value is _MISSING:
+                    default = defaults[key]
+                    if default is not _MISSING: jobqueue[key] = default
+                elif not isinstance(value, expected):
+                    raise ConfigError(f"Section 'jobqueue'.'{key}' must be a {expected.__name__}")
+
+            # walltime has a deprecated 'time' alias so it can't share the loop above
+            walltime = jobqueue.get('walltime', _MISSING)
+            if walltime is not _MISSING:
+                if not isinstance(walltime, str):
+                    raise ConfigError('Section \'jobqueue\'.\'walltime\' must be a str')
+            elif 'time' in jobqueue:
+                if not isinstance(jobqueue['time'], str):
+                    raise ConfigError('Section \'jobqueue\'.\'time\' must be a str (note that \'time\' is also deprecated, please use \'walltime\' instead')
+            else:
+                jobqueue['walltime'] = task.agent.max_walltime
+            # if 'header_skip' in jobqueue and not all(isinstance(extra, str) for extra in jobqueue['header_skip']):
+            #     raise ConfigError('Section \'jobqueue\'.\'header_skip\' must be a list of str')
+            # elif task.agent.header_skip is not None and task.agent.header_skip != '':
+            #     jobqueue['header_skip'] = [task.agent.header_skip]
+            if 'extra' in jobqueue and not all(isinstance(extra, str) for extra in jobqueue['extra']):
+                raise ConfigError('Section \'jobqueue\'.\'extra\' must be a list of str')
+        except ConfigError as error:
+            errors.append(str(error))
 
     shell = None
     if 'shell' in config:
@@ -845,4 +850,5 @@ def parse_task_options(task: Task) -> (List[str], TaskOptions):
     if image is not None: options['image'] = image
     if shell is not None: options['shell'] = shell
 
+    if use_cache: task._parsed_options = (errors, options)
     return errors, options
@@ -1,6 +1,6 @@
-import fileinput
 import os
-import sys
+import re
+import shutil
 import logging
 from os import environ
 from os.path import join
@@ -11,7 +11,7 @@ from asgiref.sync import sync_to_async
 from channels.layers import get_channel_layer
 
 from plantit.keypairs import get_user_private_key_path
-from plantit.queries import get_task_user, task_to_dict
+from plantit.queries import task_to_dict
 from plantit.ssh import SSH
 from plantit.tasks.models import Task
 from plantit.utils.tasks import get_task_orchestrator_log_file_path, get_job_log_file_name, get_job_log_file_path, \
@@ -19,12 +19,20 @@ from plantit.utils.tasks import get_task_orchestrator_log_file_path, get_job_log
 
 logger = logging.getLogger(__name__)
 
+# Docker auth info to obfuscate before returning logs to the user; the env
+# vars are static, so compile one alternation at import (None if both unset)
+_docker_auth_tokens = [token for token in (environ.get('DOCKER_USERNAME'), environ.get('DOCKER_PASSWORD')) if token]
+DOCKER_AUTH_PATTERN = re.compile('|'.join(re.escape(token) for token in _docker_auth_tokens)) if _docker_auth_tokens else None
 
-async def push_task_channel_event(task: Task):
-    user = await get_task_user(task)
-    await get_channel_layer().group_send(f"{user.username}", {
+
+async def push_task_channel_event(task: Task, task_dict: dict = None):
+    # reuse a dict the caller has already built rather than re-serializing the
+    # task (and re-reading its logs) for every websocket fanout; the serialized
+    # owner also spares a separate user lookup for the channel group name
+    if task_dict is None: task_dict = await sync_to_async(task_to_dict)(task)
+    await get_channel_layer().group_send(f"{task_dict['owner']}", {
         'type': 'task_event',
-        'task': await sync_to_async(task_to_dict)(task),
+        'task': task_dict,
     })
 
 
@@ -37,7 +45,7 @@ def log_task_status(task: Task, messages: List[str]):
 
 
 def get_remote_logs(log_file_name: str, log_file_path: str, task: Task, ssh: SSH, sftp):
-    work_dir = join(task.agent.workdir, task.workdir)
+    work_dir = task.full_workdir
     log_path = join(work_dir, log_file_name)
 
     # cmd = f"test -e {log_path} && echo exists"
@@ -47,23 +55,33 @@ def get_remote_logs(log_file_name: str, log_file_path: str, task: Task, ssh: SSH
     #     logger.warning(f"Agent log file {log_file_name} does not exist")
 
     try:
-        with open(log_file_path, 'a+') as log_file:
-            sftp.chdir(work_dir)
-            sftp.get(log_file_name, log_file.name)
-    except:
+        with sftp.open(log_path, 'rb') as remote_file:
+            # prefetch pipelines block requests instead of waiting a round trip
+            # per 32 KiB, and a 1 MiB copy buffer keeps a high-latency link full
+            remote_file.prefetch()
+            remote_file.set_pipelined(True)
+            with open(log_file_path, 'wb') as log_file:
+                shutil.copyfileobj(remote_file, log_file, length=1 << 20)
+    except IOError:
         logger.warning(f"Agent log file {log_file_name} does not exist")
+        # make sure the local file exists anyway so the post-processing
+        # below (and downstream readers) see an empty log, not a crash
+        open(log_file_path, 'a').close()
 
-    # obfuscate Docker auth info before returning logs to the user
-    # docker_username = environ.get('DOCKER_USERNAME', None)
-    # docker_password = environ.get('DOCKER_PASSWORD', None)
     lines = 0
-    for line in fileinput.input([log_file_path], inplace=True):
-        # if docker_username in line.strip():
-        #     line = line.strip().replace(docker_username, '*' * 7, 1)
-        # if docker_password in line.strip():
-        #     line = line.strip().replace(docker_password, '*' * 7)
-        lines += 1
-        sys.stdout.write(line)
+    if DOCKER_AUTH_PATTERN is None:
+        # no auth info configured, just count the lines we retrieved
+        with open(log_file_path, 'rb') as log_file:
+            for _ in log_file: lines += 1
+    else:
+        # obfuscate Docker auth info before returning logs to the user,
+        # streaming through a tempfile rather than rewriting in memory
+        tmp_path = f"{log_file_path}.tmp"
+        with open(log_file_path, 'r') as src, open(tmp_path, 'w') as dst:
+            for line in src:
+                lines += 1
+                dst.write(DOCKER_AUTH_PATTERN.sub('*' * 7, line))
+        os.replace(tmp_path, log_file_path)
 
     logger.info(f"Retrieved {lines} line(s) from {log_file_name}")
 
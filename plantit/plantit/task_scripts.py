@@ -1,6 +1,5 @@
 import os
 import logging
-from datetime import timedelta
 
 from asgiref.sync import async_to_sync
 from math import ceil
@@ -13,6 +12,7 @@ from django.conf import settings
 from plantit.task_resources import push_task_channel_event, log_task_status
 from plantit.tasks.models import Task, InputKind, TaskOptions, Parameter, EnvironmentVariable
 from plantit.utils.agents import has_virtual_memory
+from plantit.utils.tasks import parse_task_walltime
 from plantit.singularity import compose_singularity_invocation
 
 logger = logging.getLogger(__name__)
@@ -45,21 +45,17 @@ def calculate_walltime(task: Task, options: TaskOptions, inputs: List[str]):
         limit_type = 'user-requested'
     else:
         # otherwise use the default time limit from the workflow configuration
+        # (parse_task_walltime validates the HH:MM:SS format with a precompiled regex)
         jobqueue = options['jobqueue']
-        spl = jobqueue['walltime' if 'walltime' in jobqueue else 'time'].split(':')
-        hours = int(spl[0])
-        minutes = int(spl[1])
-        seconds = int(spl[2])
-        requested = timedelta(hours=hours, minutes=minutes, seconds=seconds)
+        requested = parse_task_walltime(jobqueue['walltime' if 'walltime' in jobqueue else 'time'])
         limit_type = 'workflow-default'
 
     # round to the nearest hour, making sure not to exceed agent's maximum, then convert to HH:mm:ss string
     requested_hours = ceil(requested.total_seconds() / 60 / 60)
     permitted_hours = ceil(task.agent.max_time.total_seconds() / 60 / 60)
-    hours = requested_hours if requested_hours <= permitted_hours else permitted_hours
-    hours = '1' if hours == 0 else f"{hours}"  # if we rounded down to zero, bump to 1
-    if len(hours) == 1: hours = f"0{hours}"
-    walltime = f"{hours}:00:00"
+    hours = min(requested_hours, permitted_hours)
+    if hours == 0: hours = 1  # if we rounded down to zero, bump to 1
+    walltime = f"{hours:02d}:00:00"
 
     logger.info(f"Using {limit_type} walltime {walltime} for {task.user.username}'s task {task.guid}")
     return walltime
@@ -67,46 +63,51 @@ def calculate_walltime(task: Task, options: TaskOptions, inputs: List[str]):
 
 # Commands (script subcomponents)
 
-def compose_pull_headers(task: Task) -> List[str]:
-    headers = []
-    workdir = join(task.agent.workdir, task.workdir)
-
-    # memory
-    if not has_virtual_memory(task.agent):
-        headers.append(f"#SBATCH --mem=1GB")
+def compose_utility_headers(task: Task, workdir: str, walltime: str, label: str) -> List[str]:
+    """
+    Composes scheduler headers for the single-core utility jobs (pull, push, report),
+    which differ only in walltime and log file label. Built as one literal list with
+    conditional entries filtered out, rather than growing a list append by append.
 
-    # walltime
-    walltime = settings.PULL_JOB_WALLTIME
-    headers.append(f"#SBATCH --time={walltime}")  # TODO: calculate as a function of input size?
+    Args:
+        task: The task
+        workdir: The task working directory
+        walltime: The job walltime (HH:MM:SS)
+        label: The log file label (e.g. 'pull' for plantit.%j.pull.out)
 
-    # queue
+    Returns: The header lines
+    """
     queue = task.agent.orchestrator_queue if task.agent.orchestrator_queue is not None and task.agent.orchestrator_queue != '' else task.agent.queue
-    headers.append(f"#SBATCH --partition={queue}")
-
-    # project/allocation
-    if task.agent.project is not None and task.agent.project != '':
-        headers.append(f"#SBATCH -A {task.agent.project}")
-
-    # nodes
-    headers.append(f"#SBATCH -N 1")
-
-    # cores
-    headers.append(f"#SBATCH -n 1")
-
-    # email notifications
-    headers.append("#SBATCH --mail-type=END,FAIL")
-    headers.append(f"#SBATCH --mail-user={task.user.email}")
+    headers = [
+        # memory
+        "#SBATCH --mem=1GB" if not has_virtual_memory(task.agent) else None,
+        # walltime
+        f"#SBATCH --time={walltime}",
+        # queue
+        f"#SBATCH --partition={queue}",
+        # project/allocation
+        f"#SBATCH -A {task.agent.project}" if task.agent.project is not None and task.agent.project != '' else None,
+        # nodes
+        "#SBATCH -N 1",
+        # cores
+        "#SBATCH -n 1",
+        # email notifications
+        "#SBATCH --mail-type=END,FAIL",
+        f"#SBATCH --mail-user={task.user.email}",
+        # log files
+        f"#SBATCH --output={join(workdir, f'plantit.%j.{label}.out')}",
+        f"#SBATCH --error={join(workdir, f'plantit.%j.{label}.err')}",
+    ]
+    return [header for header in headers if header is not None]
 
-    # log files
-    headers.append(f"#SBATCH --output={join(workdir, 'plantit.%j.pull.out')}")
-    headers.append(f"#SBATCH --error={join(workdir, 'plantit.%j.pull.err')}")
 
-    return headers
+def compose_pull_headers(task: Task, workdir: str) -> List[str]:
+    # TODO: calculate walltime as a function of input size?
+    return compose_utility_headers(task, workdir, settings.PULL_JOB_WALLTIME, 'pull')
 
 
-def compose_pull_commands(task: Task, options: TaskOptions) -> List[str]:
+def compose_pull_commands(task: Task, options: TaskOptions, workdir: str) -> List[str]:
     commands = []
-    workdir = join(task.agent.workdir, task.workdir)
     commands.append(f"cd {workdir}")
 
     # job arrays may cause an invalid singularity cache due to lots of simultaneous pulls of the same image...
@@ -136,11 +137,10 @@ def compose_pull_commands(task: Task, options: TaskOptions) -> List[str]:
     return commands
 
 
-def compose_job_headers(task: Task, options: TaskOptions, inputs: List[str]) -> List[str]:
+def compose_job_headers(task: Task, options: TaskOptions, inputs: List[str], workdir: str) -> List[str]:
     if 'jobqueue' not in options: return []
     jobqueue = options['jobqueue']
     headers = []
-    workdir = join(task.agent.workdir, task.workdir)
 
     # memory
     if ('memory' in jobqueue or 'mem' in jobqueue) and not has_virtual_memory(task.agent):
@@ -199,104 +199,74 @@ def compose_job_headers(task: Task, options: TaskOptions, inputs: List[str]) ->
     return headers
 
 
-def compose_job_commands(task: Task, options: TaskOptions) -> List[str]:
-    commands = []
-    workdir = join(task.agent.workdir, task.workdir)
-    commands.append(f"cd {workdir}")
-
-    # if this agent uses TACC's launcher, use a parameter sweep script
-    if task.agent.launcher:
-        commands.append(f"export LAUNCHER_WORKDIR={workdir}")
-        commands.append(f"export LAUNCHER_JOB_FILE={os.environ.get('LAUNCHER_SCRIPT_NAME')}")
-        commands.append("$LAUNCHER_DIR/paramrun")
-    # otherwise use SLURM job arrays
-    else:
-        image = options['image']
-        command = options['command']
-        env = options['env']
-        # TODO: if workflow is configured for gpu, use the number of gpus configured on the agent
-        gpus = options['gpus'] if 'gpus' in options else 0
-        parameters = (options['parameters'] if 'parameters' in options else []) + [
-            Parameter(key='OUTPUT', value=options['output']['from']),
-            Parameter(key='GPUS', value=str(gpus))]
-        bind_mounts = options['mount'] if ('mount' in options and isinstance(options['mount'], list)) else []
-        no_cache = options['no_cache'] if 'no_cache' in options else False
-        shell = options['shell'] if 'shell' in options else None
-
-        # for any bind mounts, create eponymous subdirectories of the working directory
-        for mount in bind_mounts:
-            commands.append(f"mkdir -p {join(workdir, mount['host_path'])}")
-
-        if 'input' in options:
-            input_kind = options['input']['kind']
-            input_dir_name = options['input']['path'].rpartition('/')[2]
-
-            if input_kind == 'files' or input_kind == 'file':
-                input_path = join(workdir, 'input', input_dir_name, '$file') if input_kind == 'files' else join(workdir, 'input', '$file')
-                parameters = parameters + [Parameter(key='INPUT', value=input_path), Parameter(key='INDEX', value='$SLURM_ARRAY_TASK_ID')]
-                commands.append(f"file=$(head -n $SLURM_ARRAY_TASK_ID {join(workdir, settings.INPUTS_FILE_NAME)} | tail -1)")
-            elif options['input']['kind'] == 'directory':
-                input_path = join(workdir, 'input', input_dir_name)
-                parameters = parameters + [Parameter(key='INPUT', value=input_path)]
-            else: raise ValueError(f"Unsupported \'input.kind\': {input_kind}")
-
-        commands = commands + compose_singularity_invocation(
-            work_dir=workdir,
-            image=image,
-            commands=command,
-            env=env,
-            parameters=parameters,
-            bind_mounts=bind_mounts,
-            no_cache=no_cache,
-            gpus=gpus,
-            shell=shell)
-
+def compose_job_commands(task: Task, options: TaskOptions, workdir: str) -> List[str]:
     newline = '\n'
-    logger.debug(f"Using container commands: {newline.join(commands)}")
-    return commands
-
-
-def compose_push_headers(task: Task) -> List[str]:
-    headers = []
-    workdir = join(task.agent.workdir, task.workdir)
 
-    # memory
-    if not has_virtual_memory(task.agent):
-        headers.append(f"#SBATCH --mem=1GB")
+    # if this agent uses TACC's launcher, use a parameter sweep script: a fixed
+    # preamble, so dispatch once and return it early rather than threading both
+    # execution styles through one control flow
+    if task.agent.launcher:
+        commands = [
+            f"cd {workdir}",
+            f"export LAUNCHER_WORKDIR={workdir}",
+            f"export LAUNCHER_JOB_FILE={settings.LAUNCHER_SCRIPT_NAME}",
+            "$LAUNCHER_DIR/paramrun"]
+        logger.debug(f"Using container commands: {newline.join(commands)}")
+        return commands
 
-    # walltime
-    # TODO: calculate as a function of number/size of output files?
-    walltime = settings.PUSH_JOB_WALLTIME
-    headers.append(f"#SBATCH --time={walltime}")
+    # otherwise use SLURM job arrays
+    commands = [f"cd {workdir}"]
+    image = options['image']
+    command = options['command']
+    env = options['env']
+    # TODO: if workflow is configured for gpu, use the number of gpus configured on the agent
+    gpus = options['gpus'] if 'gpus' in options else 0
+    parameters = (options['parameters'] if 'parameters' in options else []) + [
+        Parameter(key='OUTPUT', value=options['output']['from']),
+        Parameter(key='GPUS', value=str(gpus))]
+    bind_mounts = options['mount'] if ('mount' in options and isinstance(options['mount'], list)) else []
+    no_cache = options['no_cache'] if 'no_cache' in options else False
+    shell = options['shell'] if 'shell' in options else None
 
-    # queue
-    queue = task.agent.orchestrator_queue if task.agent.orchestrator_queue is not None and task.agent.orchestrator_queue != '' else task.agent.queue
-    headers.append(f"#SBATCH --partition={queue}")
+    # for any bind mounts, create eponymous subdirectories of the working directory
+    for mount in bind_mounts:
+        commands.append(f"mkdir -p {join(workdir, mount['host_path'])}")
 
-    # project/allocation
-    if task.agent.project is not None and task.agent.project != '':
-        headers.append(f"#SBATCH -A {task.agent.project}")
+    if 'input' in options:
+        input_kind = options['input']['kind']
+        input_dir_name = options['input']['path'].rpartition('/')[2]
 
-    # nodes
-    headers.append(f"#SBATCH -N 1")
+        if input_kind == 'files' or input_kind == 'file':
+            input_path = join(workdir, 'input', input_dir_name, '$file') if input_kind == 'files' else join(workdir, 'input', '$file')
+            parameters = parameters + [Parameter(key='INPUT', value=input_path), Parameter(key='INDEX', value='$SLURM_ARRAY_TASK_ID')]
+            commands.append(f"file=$(head -n $SLURM_ARRAY_TASK_ID {join(workdir, settings.INPUTS_FILE_NAME)} | tail -1)")
+        elif input_kind == 'directory':
+            input_path = join(workdir, 'input', input_dir_name)
+            parameters = parameters + [Parameter(key='INPUT', value=input_path)]
+        else: raise ValueError(f"Unsupported \'input.kind\': {input_kind}")
 
-    # cores
-    headers.append(f"#SBATCH -n 1")
+    commands = commands + compose_singularity_invocation(
+        work_dir=workdir,
+        image=image,
+        commands=command,
+        env=env,
+        parameters=parameters,
+        bind_mounts=bind_mounts,
+        no_cache=no_cache,
+        gpus=gpus,
+        shell=shell)
 
-    # email notifications
-    headers.append("#SBATCH --mail-type=END,FAIL")
-    headers.append(f"#SBATCH --mail-user={task.user.email}")
+    logger.debug(f"Using container commands: {newline.join(commands)}")
+    return commands
 
-    # log files
-    headers.append(f"#SBATCH --output={join(workdir, 'plantit.%j.push.out')}")
-    headers.append(f"#SBATCH --error={join(workdir, 'plantit.%j.push.err')}")
 
-    return headers
+def compose_push_headers(task: Task, workdir: str) -> List[str]:
+    # TODO: calculate walltime as a function of number/size of output files?
+    return compose_utility_headers(task, workdir, settings.PUSH_JOB_WALLTIME, 'push')
 
 
-def compose_push_commands(task: Task, options: TaskOptions) -> List[str]:
+def compose_push_commands(task: Task, options: TaskOptions, workdir: str) -> List[str]:
     commands = []
-    workdir = join(task.agent.workdir, task.workdir)
     commands.append(f"cd {workdir}")
 
     # create staging directory
@@ -310,30 +280,30 @@ def compose_push_commands(task: Task, options: TaskOptions) -> List[str]:
     commands.append(mkdir_command)
 
     # copy output files to staging directory
+    # (bind loop invariants — the include section and trap messages — once, not per iteration)
     output = options['output']
-    if 'include' in output:
+    include = output.get('include')
+    if include is not None:
         cp_cmd = f"cp -t "
 
         # exact matches
-        if 'names' in output['include']:
-            for name in output['include']['names']:
-                path = join(workdir, name)
-                trap_msg = f"echo 'No included names to move'"
-                commands.append(f"{cp_cmd} {staging_dir} {path} || {trap_msg}")
-                commands.append(f"{cp_cmd} {zip_dir} {path} || {trap_msg}")
+        trap_msg = "echo 'No included names to move'"
+        for name in include.get('names', []):
+            path = join(workdir, name)
+            commands.append(f"{cp_cmd} {staging_dir} {path} || {trap_msg}")
+            commands.append(f"{cp_cmd} {zip_dir} {path} || {trap_msg}")
 
         # glob matches
-        if 'patterns' in output['include']:
-            for pattern in (list(output['include']['patterns'])):
-                pattern = join(workdir, f"**{pattern}*")
-                trap_msg = f"echo 'No included patterns to move'"
-                commands.append(f"{cp_cmd} {staging_dir} {pattern} || {trap_msg}")
-                commands.append(f"{cp_cmd} {zip_dir} {pattern} || {trap_msg}")
+        trap_msg = "echo 'No included patterns to move'"
+        for pattern in include.get('patterns', []):
+            pattern = join(workdir, f"**{pattern}*")
+            commands.append(f"{cp_cmd} {staging_dir} {pattern} || {trap_msg}")
+            commands.append(f"{cp_cmd} {zip_dir} {pattern} || {trap_msg}")
 
         # include all scheduler log files in zip file
+        trap_msg = "echo 'No log files to move'"
         for pattern in ['out', 'err']:
             pattern = join(workdir, f"**{pattern}*")
-            trap_msg = f"echo 'No log files to move'"
             commands.append(f"{cp_cmd} {staging_dir} {pattern} || {trap_msg}")
             commands.append(f"{cp_cmd} {zip_dir} {pattern} || {trap_msg}")
     else:
@@ -375,40 +345,8 @@ def compose_push_commands(task: Task, options: TaskOptions) -> List[str]:
     return commands
 
 
-def compose_report_headers(task: Task) -> List[str]:
-    headers = []
-    workdir = join(task.agent.workdir, task.workdir)
-
-    # memory
-    if not has_virtual_memory(task.agent):
-        headers.append(f"#SBATCH --mem=1GB")
-
-    # walltime
-    headers.append(f"#SBATCH --time=00:30:00")
-
-    # queue
-    queue = task.agent.orchestrator_queue if task.agent.orchestrator_queue is not None and task.agent.orchestrator_queue != '' else task.agent.queue
-    headers.append(f"#SBATCH --partition={queue}")
-
-    # project/allocation
-    if task.agent.project is not None and task.agent.project != '':
-        headers.append(f"#SBATCH -A {task.agent.project}")
-
-    # nodes
-    headers.append(f"#SBATCH -N 1")
-
-    # cores
-    headers.append(f"#SBATCH -n 1")
-
-    # email notifications
-    headers.append("#SBATCH --mail-type=END,FAIL")
-    headers.append(f"#SBATCH --mail-user={task.user.email}")
-
-    # log files
-    headers.append(f"#SBATCH --output={join(workdir, 'plantit.%j.report.out')}")
-    headers.append(f"#SBATCH --error={join(workdir, 'plantit.%j.report.err')}")
-
-    return headers
+def compose_report_headers(task: Task, workdir: str) -> List[str]:
+    return compose_utility_headers(task, workdir, '00:30:00', 'report')
 
 
 def compose_report_commands(task: Task) -> List[str]:
@@ -423,37 +361,35 @@ def compose_report_commands(task: Task) -> List[str]:
 
 SCRIPT_TEMPLATE = ["#!/bin/bash", "#SBATCH --job-name=plantit"]
 
+
+def compose_script(task: Task, headers: List[str], commands: List[str]) -> List[str]:
+    # splat the pieces into one list rather than chaining + concatenations,
+    # which would allocate an intermediate list per piece
+    return [*SCRIPT_TEMPLATE, *headers, task.agent.pre_commands, *commands]
+
+
 def compose_pull_script(task: Task, options: TaskOptions) -> List[str]:
-    return SCRIPT_TEMPLATE + \
-            compose_pull_headers(task) + \
-            [task.agent.pre_commands] + \
-            compose_pull_commands(task, options)
+    workdir = task.full_workdir
+    return compose_script(task, compose_pull_headers(task, workdir), compose_pull_commands(task, options, workdir))
 
 
 def compose_job_script(task: Task, options: TaskOptions, inputs: List[str]) -> List[str]:
-    return SCRIPT_TEMPLATE + \
-            compose_job_headers(task, options, inputs) + \
-            [task.agent.pre_commands] + \
-            compose_job_commands(task, options)
+    workdir = task.full_workdir
+    return compose_script(task, compose_job_headers(task, options, inputs, workdir), compose_job_commands(task, options, workdir))
 
 
 def compose_push_script(task: Task, options: TaskOptions) -> List[str]:
-    return SCRIPT_TEMPLATE + \
-            compose_push_headers(task) + \
-            [task.agent.pre_commands] + \
-            compose_push_commands(task, options)
+    workdir = task.full_workdir
+    return compose_script(task, compose_push_headers(task, workdir), compose_push_commands(task, options, workdir))
 
 
 def compose_report_script(task: Task) -> List[str]:
-    return SCRIPT_TEMPLATE + \
-            compose_report_headers(task) + \
-            [task.agent.pre_commands] + \
-            compose_report_commands(task)
+    workdir = task.full_workdir
+    return compose_script(task, compose_report_headers(task, workdir), compose_report_commands(task))
 
 
 def compose_launcher_script(task: Task, options: TaskOptions, inputs: List[str]) -> List[str]:
-    workdir = join(task.agent.workdir, task.workdir)
-    lines: List[str] = []
+    workdir = task.full_workdir
     image = options['image']
     command = options['command']
     env = options['env']
@@ -466,55 +402,42 @@ def compose_launcher_script(task: Task, options: TaskOptions, inputs: List[str])
     no_cache = options['no_cache'] if 'no_cache' in options else False
     shell = options['shell'] if 'shell' in options else None
 
+    # every branch below issues the same invocation, differing only in the INPUT parameter and index,
+    # so compute the shared arguments once (above) and parameterize the rest
+    def invocation(input_path: str = None, index: int = None) -> List[str]:
+        extra = [Parameter(key='INPUT', value=input_path)] if input_path is not None else []
+        return compose_singularity_invocation(
+            work_dir=workdir,
+            image=image,
+            commands=command,
+            env=env,
+            parameters=parameters + extra,
+            bind_mounts=bind_mounts,
+            no_cache=no_cache,
+            gpus=gpus,
+            shell=shell,
+            index=index)
+
     if 'input' in options:
         input_kind = options['input']['kind']
         input_dir_name = options['input']['path'].rpartition('/')[2]
 
         if input_kind == 'files':
+            # join the input directory once, not once per file
+            input_dir = join(workdir, 'input', input_dir_name)
+            lines: List[str] = []
             for i, file_name in enumerate(inputs):
-                input_path = join(workdir, 'input', input_dir_name, file_name)
-                lines = lines + compose_singularity_invocation(
-                    work_dir=workdir,
-                    image=image,
-                    commands=command,
-                    env=env,
-                    parameters=parameters + [Parameter(key='INPUT', value=input_path)],
-                    bind_mounts=bind_mounts,
-                    no_cache=no_cache,
-                    gpus=gpus,
-                    shell=shell,
-                    index=i)
+                lines += invocation(input_path=join(input_dir, file_name), index=i)
             return lines
         elif input_kind == 'directory':
-            input_path = join(workdir, 'input', input_dir_name)
-            parameters = parameters + [Parameter(key='INPUT', value=input_path)]
+            return invocation(input_path=join(workdir, 'input', input_dir_name))
         elif input_kind == 'file':
-            input_path = join(workdir, 'input', inputs[0])
-            parameters = parameters + [Parameter(key='INPUT', value=input_path)]
+            return invocation(input_path=join(workdir, 'input', inputs[0]))
         else: raise ValueError(f"Unsupported \'input.kind\': {input_kind}")
     elif 'iterations' in options:
-        iterations = options['iterations']
-        for i in range(0, iterations):
-            lines = lines + compose_singularity_invocation(
-                work_dir=workdir,
-                image=image,
-                commands=command,
-                env=env,
-                parameters=parameters,
-                bind_mounts=bind_mounts,
-                no_cache=no_cache,
-                gpus=gpus,
-                shell=shell,
-                index=i)
+        lines: List[str] = []
+        for i in range(0, options['iterations']):
+            lines += invocation(index=i)
         return lines
 
-    return lines + compose_singularity_invocation(
-        work_dir=workdir,
-        image=image,
-        commands=command,
-        env=env,
-        parameters=parameters,
-        bind_mounts=bind_mounts,
-        no_cache=no_cache,
-        gpus=gpus,
-        shell=shell)
+    return invocation()
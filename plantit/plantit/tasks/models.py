@@ -1,11 +1,13 @@
 import json
 from enum import Enum
 from itertools import chain
+from os.path import join
 from typing import TypedDict, List
 
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy
 from django_celery_beat.models import PeriodicTask
 from taggit.managers import TaggableManager
@@ -144,6 +146,11 @@ class Task(models.Model):
 
     # State props #
 
+    @cached_property
+    def full_workdir(self):
+        # the task's working directory on its agent, joined once per instance
+        return join(self.agent.workdir, self.workdir)
+
     @property
     def is_success(self):
         return self.job_status in self.SLURM_SUCCESS_STATES \
@@ -16,6 +16,7 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import api_view
 
 import plantit.queries as q
+from plantit.http import ORJSONResponse
 from plantit.sns import SnsClient
 from plantit.ssh import get_agent_ssh_client
 from plantit import settings
@@ -25,7 +26,8 @@ from plantit.task_resources import push_task_channel_event, log_task_status
 from plantit.tasks.models import Task, TaskStatus, DelayedTask, RepeatingTask, TriggeredTask
 from plantit.utils.tasks import get_task_orchestrator_log_file_path, \
     get_job_log_file_path, \
-    get_task_agent_log_file_path
+    get_task_agent_log_file_path, \
+    tail_lines
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +69,7 @@ def get_or_create(request):
             task_dict = q.task_to_dict(task)
 
             log_task_status(task, [f"Created task {task.guid} on {task.agent.name}"])
-            async_to_sync(push_task_channel_event)(task)
+            async_to_sync(push_task_channel_event)(task, task_dict)
 
         # otherwise register delayed or repeating task
         elif task_type == 'after':
@@ -174,7 +176,7 @@ def download_output_file(request, guid):
     body = json.loads(request.body.decode('utf-8'))
     path = body['path']
     ssh = get_agent_ssh_client(task.agent)
-    workdir = join(task.agent.workdir, task.workdir)
+    workdir = task.full_workdir
 
     with ssh:
         with ssh.client.open_sftp() as sftp:
@@ -238,8 +240,7 @@ def get_task_logs(request, guid):
 
     log_path = get_task_orchestrator_log_file_path(task)
     if not Path(log_path).is_file(): return HttpResponseNotFound()
-    with open(log_path, 'r') as log_file:
-        return JsonResponse({'lines': log_file.readlines()})
+    return ORJSONResponse({'lines': tail_lines(log_path)})
 
 
 @login_required
@@ -259,7 +260,7 @@ def download_scheduler_logs(request, guid):
     except Task.DoesNotExist:
         return HttpResponseNotFound()
     with open(get_job_log_file_path(task)) as file:
-        return JsonResponse({'lines': file.readlines()})
+        return ORJSONResponse({'lines': file.readlines()})
 
 
 @login_required
@@ -278,8 +279,7 @@ def get_scheduler_logs(request, guid):
             return HttpResponseNotFound()
     except Task.DoesNotExist:
         return HttpResponseNotFound()
-    with open(get_job_log_file_path(task)) as file:
-        return JsonResponse({'lines': file.readlines()})
+    return ORJSONResponse({'lines': tail_lines(get_job_log_file_path(task))})
 
 
 @login_required
@@ -299,7 +299,7 @@ def download_agent_logs(request, guid):
     except Task.DoesNotExist:
         return HttpResponseNotFound()
     with open(get_task_agent_log_file_path(task)) as file:
-        return JsonResponse({'lines': file.readlines()})
+        return ORJSONResponse({'lines': file.readlines()})
 
 
 @login_required
@@ -318,8 +318,7 @@ def get_agent_logs(request, guid):
             return HttpResponseNotFound()
     except Task.DoesNotExist:
         return HttpResponseNotFound()
-    with open(get_task_agent_log_file_path(task)) as file:
-        return JsonResponse({'lines': file.readlines()})
+    return ORJSONResponse({'lines': tail_lines(get_task_agent_log_file_path(task))})
 
 
 def __cancel(task: Task):
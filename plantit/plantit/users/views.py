@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import traceback
+from datetime import datetime
 from urllib.parse import parse_qs
 from urllib.parse import urlencode
 
@@ -122,6 +123,7 @@ class IDPViewSet(viewsets.ViewSet):
         if created: profile.created = timezone.now()
         profile.cyverse_access_token = access_token
         profile.cyverse_refresh_token = refresh_token
+        profile.cyverse_token_exp = datetime.fromtimestamp(decoded_access_token['exp'], timezone.utc)
         user.profile = profile
         profile.save()
         user.save()
@@ -197,8 +199,7 @@ class UsersViewSet(viewsets.ModelViewSet, mixins.RetrieveModelMixin):
     def acknowledge_first_login(self, request):
         user = self.get_object()
         user.profile.first_login = False
-        user.profile.save()
-        user.save()
+        user.profile.save(update_fields=['first_login'])
         return HttpResponse(status=200)
 
     @action(detail=False, methods=['get'])
@@ -213,16 +214,14 @@ class UsersViewSet(viewsets.ModelViewSet, mixins.RetrieveModelMixin):
             user.profile.push_notification_topic_arn = topic['TopicArn']
             user.profile.push_notification_sub_arn = subscription['SubscriptionArn']
             user.profile.push_notification_status = 'pending'
-            user.profile.save()
-            user.save()
+            user.profile.save(update_fields=['push_notification_topic_arn', 'push_notification_sub_arn', 'push_notification_status'])
 
             return JsonResponse({'push_notifications': user.profile.push_notification_status})
         else:
             sub_status = get_sns_subscription_status(user.profile.push_notification_topic_arn)
             if sub_status == 'pending':
                 user.profile.push_notification_status = 'pending'
-                user.profile.save()
-                user.save()
+                user.profile.save(update_fields=['push_notification_status'])
                 return JsonResponse({'push_notifications': sub_status})
             else:
                 sns.delete_subscription(user.profile.push_notification_sub_arn)
@@ -230,24 +229,21 @@ class UsersViewSet(viewsets.ModelViewSet, mixins.RetrieveModelMixin):
                 user.profile.push_notification_topic_arn = None
                 user.profile.push_notification_sub_arn = None
                 user.profile.push_notification_status = 'disabled'
-                user.profile.save()
-                user.save()
+                user.profile.save(update_fields=['push_notification_topic_arn', 'push_notification_sub_arn', 'push_notification_status'])
                 return JsonResponse({'push_notifications': user.profile.push_notification_status})
 
     @action(detail=False, methods=['get'])
     def toggle_hints(self, request):
         user = request.user
         user.profile.hints = not user.profile.hints
-        user.profile.save()
-        user.save()
+        user.profile.save(update_fields=['hints'])
         return JsonResponse({'hints': user.profile.hints})
 
     @action(detail=False, methods=['get'])
     def toggle_dark_mode(self, request):
         user = request.user
         user.profile.dark_mode = not user.profile.dark_mode
-        user.profile.save()
-        user.save()
+        user.profile.save(update_fields=['dark_mode'])
         return JsonResponse({
             'dark_mode': user.profile.dark_mode
         })
@@ -259,8 +255,7 @@ class UsersViewSet(viewsets.ModelViewSet, mixins.RetrieveModelMixin):
         # TODO: reenable
         if user.profile.push_notification_status == 'pending':
             user.profile.push_notification_status = get_sns_subscription_status(user.profile.push_notification_topic_arn)
-            user.profile.save()
-            user.save()
+            user.profile.save(update_fields=['push_notification_status'])
 
         migration, created = Migration.objects.get_or_create(profile=user.profile)
         if created:
@@ -312,8 +307,8 @@ class UsersViewSet(viewsets.ModelViewSet, mixins.RetrieveModelMixin):
         profile = Profile.objects.get(user=request.user)
         if q.has_github_info(profile):
             try:
-                response['github_profile'] = async_to_sync(q.get_user_github_profile)(user)
-                response['organizations'] = async_to_sync(q.get_user_github_organizations)(user)
+                response['github_profile'] = async_to_sync(q.get_user_github_profile)(profile)
+                response['organizations'] = async_to_sync(q.get_user_github_organizations)(profile)
                 response['workflows']['user'] = q.list_user_workflows(profile.github_username)
                 response['workflows']['org'] = async_to_sync(q.list_user_org_workflows)(user)
             except:
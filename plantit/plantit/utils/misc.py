@@ -7,20 +7,12 @@ import numpy as np
 
 def del_none(d) -> dict:
     """
-    Delete keys with the value ``None`` in a dictionary, recursively.
+    Returns a copy of the dictionary with ``None``-valued keys removed, recursively.
 
-    This alters the input so you may wish to ``copy`` the dict first.
-
-    Referenced from https://stackoverflow.com/a/4256027.
+    Unlike earlier revisions this does not alter the input.
     """
-    # For Python 3, write `list(d.items())`; `d.items()` won’t work
-    # For Python 2, write `d.items()`; `d.iteritems()` won’t work
-    for key, value in list(d.items()):
-        if value is None:
-            del d[key]
-        elif isinstance(value, dict):
-            del_none(value)
-    return d  # For convenience
+    return {key: del_none(value) if isinstance(value, dict) else value
+            for key, value in d.items() if value is not None}
 
 
 def generate_secret_key() -> str:
@@ -89,9 +81,13 @@ def list_local_files(path,
     # gather all files
     all_paths = [join(path, file) for file in listdir(path) if isfile(join(path, file))]
 
+    # normalize pattern case once up front instead of re-lowercasing every pattern for every path
+    include_patterns = [pattern.lower() for pattern in include_patterns] if include_patterns is not None else None
+    exclude_patterns = [pattern.lower() for pattern in exclude_patterns] if exclude_patterns is not None else None
+
     # add files matching included patterns
     included_by_pattern = [pth for pth in all_paths if any(
-        pattern.lower() in pth.lower() for pattern in include_patterns)] if include_patterns is not None else all_paths
+        pattern in pth.lower() for pattern in include_patterns)] if include_patterns is not None else all_paths
 
     # add files included by name
     included_by_name = ([pth for pth in all_paths if pth.rpartition('/')[2] in [name for name in include_names]] \
@@ -99,15 +95,16 @@ def list_local_files(path,
                        [pth for pth in all_paths if pth in [name for name in include_names]] \
         if include_names is not None else included_by_pattern
 
-    # gather only included files
-    included = list(set(included_by_pattern + included_by_name))
+    # gather only included files (sorted so output ordering is deterministic)
+    included = sorted(set(included_by_pattern).union(included_by_name))
 
     # remove files matched excluded patterns
-    excluded_by_pattern = [name for name in included if all(pattern.lower() not in name.lower() for pattern in
+    excluded_by_pattern = [name for name in included if all(pattern not in name.lower() for pattern in
                                                             exclude_patterns)] if exclude_patterns is not None else included
 
-    # remove files excluded by name
-    excluded_by_name = [pattern for pattern in excluded_by_pattern if pattern.split('/')[
-        -1] not in exclude_names] if exclude_names is not None else excluded_by_pattern
+    # remove files excluded by name (a set makes each membership check a hash lookup)
+    exclude_name_set = set(exclude_names) if exclude_names is not None else None
+    excluded_by_name = [pattern for pattern in excluded_by_pattern if pattern.rpartition('/')[
+        2] not in exclude_name_set] if exclude_name_set is not None else excluded_by_pattern
 
     return excluded_by_name
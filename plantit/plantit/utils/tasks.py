@@ -1,4 +1,5 @@
 import os
+import re
 import traceback
 from datetime import timedelta, datetime
 from os.path import join
@@ -12,6 +13,20 @@ from plantit.tasks.models import Task, BindMount
 
 logger = logging.getLogger(__name__)
 
+# where orchestrator/agent/job logs live; fixed for the process lifetime, so read it once at import
+TASKS_LOGS = os.environ.get('TASKS_LOGS')
+
+# matches walltime strings of the form HH:MM:SS
+WALLTIME_PATTERN = re.compile(r'^(\d+):(\d+):(\d+)$')
+
+# multipliers for converting delay/limit units to seconds (one dict lookup instead of branching)
+UNIT_SECONDS = {
+    'seconds': 1,
+    'minutes': 60,
+    'hours': 60 * 60,
+    'days': 60 * 60 * 24,
+}
+
 
 def format_bind_mount(bind_mount: BindMount) -> str:
     return bind_mount['host_path'] + ':' + bind_mount['container_path']
@@ -22,15 +37,15 @@ def get_task_orchestrator_log_file_name(task: Task):
 
 
 def get_task_orchestrator_log_file_path(task: Task):
-    return join(os.environ.get('TASKS_LOGS'), get_task_orchestrator_log_file_name(task))
+    return join(TASKS_LOGS, get_task_orchestrator_log_file_name(task))
 
 
 def get_task_agent_log_file_name(task: Task):
-    return f"{task.guid}.{task.agent.name.lower()}.log"
+    return f"{task.guid}.{task.agent.name_lower}.log"
 
 
 def get_task_agent_log_file_path(task: Task):
-    return join(os.environ.get('TASKS_LOGS'), get_task_agent_log_file_name(task))
+    return join(TASKS_LOGS, get_task_agent_log_file_name(task))
 
 
 def get_job_log_file_name(task: Task):
@@ -38,7 +53,31 @@ def get_job_log_file_name(task: Task):
 
 
 def get_job_log_file_path(task: Task):
-    return join(os.environ.get('TASKS_LOGS'), get_job_log_file_name(task))
+    return join(TASKS_LOGS, get_job_log_file_name(task))
+
+
+def tail_lines(path: str, max_lines: int = 1000000, max_bytes: int = 64 * 1024 * 1024) -> List[str]:
+    """
+    Reads the last lines of the file at the given path without loading the whole
+    file, seeking to at most `max_bytes` before the end and splitting from there.
+
+    Args:
+        path: The file path
+        max_lines: The maximum number of lines to return
+        max_bytes: The maximum number of bytes to read from the end of the file
+
+    Returns: The last lines of the file (at most `max_lines`)
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        file.seek(max(0, size - max_bytes))
+        data = file.read()
+
+    # drop the first line if we started mid-file (it's probably partial)
+    lines = data.splitlines()
+    if size > max_bytes and lines: lines = lines[1:]
+
+    return [line.decode('utf-8', 'replace') for line in lines[-max_lines:]]
 
 
 def get_output_included_names(task: Task) -> List[str]:
@@ -53,7 +92,7 @@ def get_output_included_names(task: Task) -> List[str]:
     #     included.append(f"plantit.{task.job_id}.out")
     #     included.append(f"plantit.{task.job_id}.err")
 
-    return list(set(included))
+    return sorted(set(included))
 
 
 def get_output_included_patterns(task: Task) -> List[str]:
@@ -68,7 +107,7 @@ def get_output_included_patterns(task: Task) -> List[str]:
     #     included.append(f"{task.job_id}.err")
     included.append('zip')
 
-    return list(set(included))
+    return sorted(set(included))
 
 
 def has_output_target(task: Task) -> bool:
@@ -98,19 +137,12 @@ def parse_task_walltime(walltime: str) -> timedelta:
     Returns: The timedelta
 
     """
-    time_split = walltime.split(':')
-
-    # if we don't have 3 elements, or if they can't be parsed as ints, the walltime string is malformed
-    error = ValueError(f"Malformed walltime string (required format: HH:MM:SS): {walltime}")
-    if len(time_split) != 3: raise error
-    try:
-        time_hours = int(time_split[0])
-        time_minutes = int(time_split[1])
-        time_seconds = int(time_split[2])
-    except ValueError:
-        raise error
+    # if the string doesn't match HH:MM:SS it's malformed
+    match = WALLTIME_PATTERN.match(walltime)
+    if match is None: raise ValueError(f"Malformed walltime string (required format: HH:MM:SS): {walltime}")
 
-    return timedelta(hours=time_hours, minutes=time_minutes, seconds=time_seconds)
+    hours, minutes, seconds = match.groups()
+    return timedelta(hours=int(hours), minutes=int(minutes), seconds=int(seconds))
 
 
 def parse_job_id(line: str) -> str:
@@ -149,11 +181,9 @@ def parse_task_eta(data: dict) -> (datetime, int):
     except: raise ValueError(f"Failed to parse 'delay' as integer")
 
     # convert delay to seconds
-    if units == 'seconds': seconds = delay
-    elif units == 'minutes': seconds = delay * 60
-    elif units == 'hours': seconds = delay * 60 * 60
-    elif units == 'days': seconds = delay * 60 * 60 * 24
-    else: raise ValueError(f"Unsupported units (expected: seconds, minutes, hours, or days)")
+    multiplier = UNIT_SECONDS.get(units, None)
+    if multiplier is None: raise ValueError(f"Unsupported units (expected: seconds, minutes, hours, or days)")
+    seconds = delay * multiplier
 
     # calculate time task should start
     now = timezone.now()
@@ -185,13 +215,10 @@ def parse_task_time_limit(data: dict):
     except: raise ValueError(f"Failed to parse 'limit' as integer")
 
     # convert limit to seconds
-    if units == 'seconds': seconds = limit
-    elif units == 'minutes': seconds = limit * 60
-    elif units == 'hours': seconds = limit * 60 * 60
-    elif units == 'days': seconds = limit * 60 * 60 * 24
-    else: raise ValueError(f"Unsupported units (expected: seconds, minutes, hours, or days)")
+    multiplier = UNIT_SECONDS.get(units, None)
+    if multiplier is None: raise ValueError(f"Unsupported units (expected: seconds, minutes, hours, or days)")
 
-    return seconds
+    return limit * multiplier
 
 
 def parse_task_miappe_info(data: dict):
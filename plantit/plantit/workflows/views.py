@@ -1,14 +1,14 @@
-import json
 import logging
 
 from asgiref.sync import async_to_sync, sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseNotFound
+from django.http import HttpResponse, HttpResponseNotFound
 from rest_framework.decorators import api_view
 from drf_yasg.utils import swagger_auto_schema
 
 import plantit.queries as q
-from plantit.github import get_repo, list_repo_branches
+from plantit.github import get_repo_cached, list_repo_branches
+from plantit.http import ORJSONResponse
 from plantit.users.models import Profile
 
 logger = logging.getLogger(__name__)
@@ -17,13 +17,14 @@ logger = logging.getLogger(__name__)
 @swagger_auto_schema(methods='get')
 @api_view(['get'])
 def list_public(request):
-    return JsonResponse({'workflows': q.list_public_workflows()})
+    # the bundle list is cached pre-serialized, so splice the raw bytes into the response
+    return HttpResponse(b'{"workflows": ' + q.list_public_workflows_serialized() + b'}', content_type='application/json')
 
 
 @login_required
 def list_user(request):
     profile = Profile.objects.get(user=request.user)
-    return JsonResponse({'workflows': q.list_user_workflows(profile.github_username)})
+    return HttpResponse(b'{"workflows": ' + q.list_user_workflows_serialized(profile.github_username) + b'}', content_type='application/json')
 
 
 @sync_to_async
@@ -31,19 +32,19 @@ def list_user(request):
 @async_to_sync
 async def list_org(request):
     workflows = await q.list_user_org_workflows(request.user)
-    return JsonResponse({'workflows': workflows})
+    return ORJSONResponse({'workflows': workflows})
 
 
 @login_required
 def list_project(request):
-    return JsonResponse({'workflows': q.list_user_project_workflows(request.user)})
+    return ORJSONResponse({'workflows': q.list_user_project_workflows(request.user)})
 
 
 @sync_to_async
 @login_required
 @async_to_sync
 async def get(request, owner, name, branch):
-    profile = await sync_to_async(Profile.objects.get)(user=request.user)
+    profile = await q.get_user_django_profile(request.user)
     invalidate = request.GET.get('invalidate', False)
     workflow = await q.get_workflow(
         owner=owner,
@@ -57,7 +58,7 @@ async def get(request, owner, name, branch):
     last = q.get_last_task_config(request.user.username, owner, name, branch)
     if last is not None: workflow['last_config'] = last
 
-    return HttpResponseNotFound() if workflow is None else JsonResponse(workflow)
+    return HttpResponseNotFound() if workflow is None else ORJSONResponse(workflow)
 
 
 @sync_to_async
@@ -65,8 +66,8 @@ async def get(request, owner, name, branch):
 @async_to_sync
 async def search(request, owner, name, branch):
     profile = await q.get_user_django_profile(request.user)
-    repository = await get_repo(owner, name, branch, profile.github_token)
-    return HttpResponseNotFound() if repository is None else JsonResponse(repository)
+    repository = await get_repo_cached(owner, name, profile.github_token)
+    return HttpResponseNotFound() if repository is None else ORJSONResponse(repository)
 
 
 @sync_to_async
@@ -78,7 +79,7 @@ async def refresh(request, owner, name, branch):
         workflow = await q.get_workflow(owner, name, branch, profile.github_token, profile.cyverse_access_token)
     except: return HttpResponseNotFound()
     logger.info(f"Refreshed workflow {owner}/{name}/{branch}")
-    return JsonResponse(workflow)
+    return ORJSONResponse(workflow)
 
 
 @sync_to_async
@@ -87,4 +88,4 @@ async def refresh(request, owner, name, branch):
 async def branches(request, owner, name):
     profile = await q.get_user_django_profile(request.user)
     repo_branches = await list_repo_branches(owner, name, profile.github_token)
-    return JsonResponse({'branches': [branch['name'] for branch in repo_branches]})
+    return ORJSONResponse({'branches': [branch['name'] for branch in repo_branches]})